@@ -0,0 +1,7 @@
+from __future__ import print_function
+import sys
+
+from cli import main
+
+# python on the checkout directory runs the command line of cli
+sys.exit(main())
@@ -0,0 +1,178 @@
+from __future__ import print_function
+import argparse, functools, itertools, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from cache import SolutionCache
+from core import Grid, Solver
+from dlx import DLXSolver
+from sat import SatSolver
+from puzzle_io import BUFFER, FORMATS, read_puzzles, ResultWriter
+
+# the solver class of each backend
+BACKENDS = {'search': Solver, 'sat': SatSolver, 'dlx': DLXSolver}
+
+
+# solve one problem and return the solution in the same one-line format, or None if it has no solution
+# the board size comes from the length of the problem: 81 squares is sudoku, 256 hexadoku and so on
+# backend is 'search' for the backtracking Solver, 'sat' for the SAT encoding or 'dlx' for dancing links
+# cache is the path of a SQLite solution cache, or ':memory:' for one in the memory of this process
+# max_nodes bounds the search, and a problem it can't settle within that many nodes goes to the fallback backend
+# with_stats returns (solution, stats) instead, stats being the counters of the backend that gave the answer,
+# or None for an answer from the cache
+def solve_one(problem, backend='search', cache=None, max_nodes=None, fallback='dlx', with_stats=False):
+    if cache:
+        solution = solution_cache(cache, backend, max_nodes, fallback).solve(problem)
+        return (solution, None) if with_stats else solution
+    grid = Grid(problem)
+    if max_nodes is not None and backend == 'search':
+        result = Solver(grid).solve_within(max_nodes=max_nodes)
+        if not result.exceeded:
+            return (result.solution, result.stats) if with_stats else result.solution
+        backend = fallback
+    solver = BACKENDS[backend](grid)
+    solution = grid.board.to_string(solver.solution) if solver.solve() else None
+    return (solution, dict(solver.stats)) if with_stats else solution
+
+
+_caches = {}
+
+
+# the solution cache of a path and way of solving, opened once per process
+def solution_cache(path, backend, max_nodes=None, fallback='dlx'):
+    key = (path, backend, max_nodes, fallback)
+    if key not in _caches:
+        _caches[key] = SolutionCache(path=None if path == ':memory:' else path,
+                                     solve=functools.partial(solve_one, backend=backend, max_nodes=max_nodes,
+                                                             fallback=fallback))
+    return _caches[key]
+
+
+# solve a run of problems in a worker. start is the input position of the first one
+# the numpy backend propagates the whole run at once, so it wants chunks of thousands
+# details gives (input position, solution, problem, stats) for every problem instead of (input position, solution).
+# the numpy backend has no stats of its own problems, they are None
+def solve_chunk(start, problems, backend='search', cache=None, max_nodes=None, fallback='dlx', details=False):
+    if backend == 'numpy':
+        from vector import solve_batch
+        # solve_batch takes problems of one board, so a chunk that mixes sizes goes to it a size at a time
+        by_size = {}
+        for offset, problem in enumerate(problems):
+            by_size.setdefault(len(problem), []).append(offset)
+        solutions = [None] * len(problems)
+        for offsets in by_size.values():
+            for offset, solution in zip(offsets, solve_batch([problems[offset] for offset in offsets])[0]):
+                solutions[offset] = solution
+        if details:
+            return [(start + offset, solution, problems[offset], None) for offset, solution in enumerate(solutions)]
+        return list(enumerate(solutions, start))
+    if details:
+        results = []
+        for offset, problem in enumerate(problems):
+            solution, stats = solve_one(problem, backend, cache, max_nodes, fallback, True)
+            results.append((start + offset, solution, problem, stats))
+        return results
+    return [(start + offset, solve_one(problem, backend, cache, max_nodes, fallback))
+            for offset, problem in enumerate(problems)]
+
+
+# cut the problems into (input position, list of problems) pieces of at most chunksize
+def chunks(problems, chunksize):
+    chunk = []
+    start = 0
+    for problem in problems:
+        chunk.append(problem)
+        if len(chunk) == chunksize:
+            yield start, chunk
+            start += chunksize
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+
+# solve every problem on a pool of worker processes and yield (input position, solution) pairs
+# solutions come in input order, or as soon as each chunk is done when ordered is False
+# problems can be any iterable, such as puzzle_io.read_puzzles. at most backlog chunks per worker are read ahead
+# of the results, so a stream of any length is solved in constant memory. workers=0 solves in this process
+# details yields (input position, solution, problem, stats) tuples instead, see solve_chunk
+def solve_many(problems, workers=None, chunksize=16, ordered=True, backlog=4, backend='search', cache=None,
+               max_nodes=None, fallback='dlx', details=False):
+    if workers == 0:
+        for start, chunk in chunks(problems, chunksize):
+            for result in solve_chunk(start, chunk, backend, cache, max_nodes, fallback, details):
+                yield result
+        return
+    workers = workers or os.cpu_count()
+    window = workers * backlog
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, chunk in chunks(problems, chunksize):
+            pending.append(executor.submit(solve_chunk, start, chunk, backend, cache, max_nodes, fallback,
+                                           details))
+            if len(pending) >= window:
+                for result in next_done(pending, ordered):
+                    yield result
+        while pending:
+            for result in next_done(pending, ordered):
+                yield result
+
+
+# take the results of one chunk off the pending futures, the oldest one or the first to finish
+def next_done(pending, ordered):
+    if ordered:
+        future = pending.popleft()
+    else:
+        future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+        pending.remove(future)
+    return future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve sudoku and hexadoku problems on a pool of processes.')
+    parser.add_argument('files', nargs='*', default=['-'],
+                        help='easy_sudoku_problems.txt, hard_sudoku_problems.txt or any one-problem-per-line file, '
+                             'optionally gzipped. - or nothing reads stdin')
+    parser.add_argument('-o', '--output', default='-', help='file for the solutions, .gz to compress (default: stdout)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, 0 to solve in this process (default: one per core)')
+    parser.add_argument('-c', '--chunksize', type=int, default=16, help='problems handed to a worker at a time')
+    parser.add_argument('-b', '--backend', choices=['search', 'sat', 'dlx', 'numpy'], default='search',
+                        help='backtracking search, the SAT encoding (picosat when it is installed), '
+                             'dancing links exact cover, or numpy propagation of whole chunks with the search '
+                             'for what is left (give it a large --chunksize, and pip install numpy first)')
+    parser.add_argument('-C', '--cache', help='SQLite file of solutions shared by the workers and kept between runs, '
+                                              'or :memory: for a cache in each worker. repeats and their variants '
+                                              '(relabeled, rows or columns swapped, transposed) are not solved again')
+    parser.add_argument('-m', '--max-nodes', type=int,
+                        help='give the search this many nodes, then hand the problem to the fallback backend')
+    parser.add_argument('-f', '--fallback', choices=['sat', 'dlx'], default='dlx',
+                        help='backend for the problems the search runs out of nodes on (default: dlx)')
+    parser.add_argument('-F', '--format', choices=FORMATS, default='line',
+                        help='solution lines, problem and solution grids, JSON lines with the search stats or '
+                             'packed binary records (default: line)')
+    parser.add_argument('-B', '--buffer', type=int, default=BUFFER,
+                        help='bytes of results to gather before writing them out, 0 to write each as it comes '
+                             '(default: %d)' % BUFFER)
+    parser.add_argument('-u', '--unordered', action='store_true',
+                        help='write solutions as soon as they are found, each after its input position')
+    args = parser.parse_args(argv)
+
+    problems = itertools.chain.from_iterable(read_puzzles(path) for path in args.files)
+    start = time.time()
+    unsolved = 0
+    with ResultWriter(args.output, args.format, args.unordered, args.buffer) as writer:
+        # the problems and stats only go back and forth between the processes for the formats that show them
+        for result in solve_many(problems, args.workers, args.chunksize, not args.unordered, backend=args.backend,
+                                 cache=args.cache, max_nodes=args.max_nodes, fallback=args.fallback,
+                                 details=args.format != 'line'):
+            if result[1] is None:
+                unsolved += 1
+            writer.write(*result)
+    print('solved %d of %d problems with %s workers in %.3fs' % (
+        writer.written - unsolved, writer.written, args.workers if args.workers is not None else os.cpu_count(),
+        time.time() - start), file=sys.stderr)
+    return 1 if unsolved else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+from __future__ import print_function
+import argparse, json, os, platform, subprocess, sys, time, tracemalloc
+from timeit import default_timer
+
+from batch import BACKENDS
+from core import Grid
+from puzzle_io import CORPORA, corpus
+
+# percentiles reported for every measure
+PERCENTILES = (50, 90, 99)
+# measures compared against the baseline. times are noisy and get the tolerance, the counters are exact
+TIMED = ('seconds',)
+COUNTED = ('nodes', 'backtracks', 'propagations')
+# runs of every problem by default, the fastest one counting, and how much longer than the baseline a time has to
+# get before it counts at all, whatever the tolerance. the median of a few milliseconds moves by more than that
+# between two runs of the same tree
+REPEAT = 3
+TIME_FLOOR = 0.01
+# modules whose import time is measured: the solver core, the libraries and what the pool workers load
+IMPORTS = ('core', 'sudoku', 'hexadoku', 'batch')
+
+
+# the search counters of any backend under one set of names.
+# the SAT solver's decisions and conflicts stand in for nodes and backtracks
+def counters(solver):
+    stats = solver.stats
+    return {
+        'nodes': stats.get('nodes', stats.get('decisions', 0)),
+        'backtracks': stats.get('backtracks', stats.get('conflicts', 0)),
+        'propagations': stats.get('propagations', 0),
+    }
+
+
+# solve one problem and measure it. peak memory comes from a second run under tracemalloc,
+# which would slow the timed run down
+def measure(problem, backend, memory=True):
+    solver = BACKENDS[backend](Grid(problem))
+    start = default_timer()
+    solved = solver.solve()
+    record = {'seconds': default_timer() - start, 'solved': solved}
+    record.update(counters(solver))
+    if memory:
+        solver = BACKENDS[backend](Grid(problem))
+        tracemalloc.start()
+        try:
+            solver.solve()
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return record
+
+
+# seconds to import each module in a fresh interpreter, the fastest of repeat runs.
+# -X importtime writes the cumulative microseconds of every module it loads. raises ValueError for a module it
+# never writes, being loaded already when the interpreter starts
+def import_times(modules=IMPORTS, repeat=5):
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = {}
+    for module in modules:
+        best = None
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=here,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+                                    check=True).stderr
+            micros = None
+            for line in output.splitlines():
+                fields = line.split('|')
+                if len(fields) == 3 and fields[2].strip() == module:
+                    micros = int(fields[1])
+            # a module the interpreter loads before running anything, like sys, is never imported by the command
+            if micros is None:
+                raise ValueError('%s is loaded before the import, there is no import time to measure' % module)
+            best = micros if best is None else min(best, micros)
+        times[module] = best / 1e6
+    return times
+
+
+# nearest-rank percentiles, the maximum and the total of a list of numbers
+def summarize(values):
+    values = sorted(values)
+    summary = {'max': values[-1], 'total': sum(values)}
+    for p in PERCENTILES:
+        summary['p%d' % p] = values[max(0, -(-len(values) * p // 100) - 1)]
+    return summary
+
+
+# run every backend over every corpus. repeat keeps the fastest time of each problem
+def run(corpora, backends, repeat=REPEAT, memory=True, limit=None):
+    results = {}
+    for name in corpora:
+        problems = corpus(name)[:limit]
+        for backend in backends:
+            records = []
+            for problem in problems:
+                record = measure(problem, backend, memory)
+                for _ in range(repeat - 1):
+                    record['seconds'] = min(record['seconds'], measure(problem, backend, False)['seconds'])
+                records.append(record)
+            measures = TIMED + COUNTED + (('peak_bytes',) if memory else ())
+            results['%s/%s' % (backend, name)] = {
+                'problems': len(problems),
+                'unsolved': sum(not record['solved'] for record in records),
+                'summary': dict((key, summarize([record[key] for record in records])) for key in measures),
+                'per_problem': records,
+            }
+    return {'meta': meta(repeat), 'results': results}
+
+
+def meta(repeat):
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': repeat}
+
+
+# lines describing every measure that got worse than the baseline. the counters may not grow at all and a
+# problem that used to be solved must still be. times only count with a tolerance, which they may grow by, and
+# then only the p90 and total of a set, by more than TIME_FLOOR, and imports by more than a millisecond
+def regressions(current, baseline, tolerance=None):
+    found = []
+    for module, seconds in sorted(current.get('imports', {}).items()):
+        was = baseline.get('imports', {}).get(module)
+        if tolerance is not None and was is not None and seconds > was * (1 + tolerance) and seconds - was > 1e-3:
+            found.append('import %s: %.2f ms, baseline %.2f ms' % (module, seconds * 1e3, was * 1e3))
+    for key, result in sorted(current.get('results', {}).items()):
+        before = baseline.get('results', {}).get(key)
+        # not measured in the baseline, or over a different number of problems
+        if before is None or before['problems'] != result['problems']:
+            continue
+        if result['unsolved'] > before['unsolved']:
+            found.append('%s: %d unsolved, was %d' % (key, result['unsolved'], before['unsolved']))
+        for measure in COUNTED:
+            for stat in ('p50', 'p90', 'total'):
+                now = result['summary'][measure][stat]
+                was = before['summary'][measure][stat]
+                if now > was:
+                    found.append('%s: %s %s %d, baseline %d' % (key, measure, stat, now, was))
+        if tolerance is None:
+            continue
+        for measure in TIMED:
+            for stat in ('p90', 'total'):
+                now = result['summary'][measure][stat]
+                was = before['summary'][measure][stat]
+                if now > was * (1 + tolerance) and now - was > TIME_FLOOR:
+                    found.append('%s: %s %s %.6g, baseline %.6g' % (key, measure, stat, now, was))
+    return found
+
+
+def report(data, out=sys.stdout):
+    if 'imports' in data:
+        print('%-16s %10s' % ('import', 'ms'), file=out)
+        for module, seconds in sorted(data['imports'].items()):
+            print('%-16s %10.2f' % (module, seconds * 1e3), file=out)
+        return
+    print('%-16s %8s %10s %10s %10s %10s %10s %12s' % ('run', 'problems', 'p50 ms', 'p90 ms', 'p99 ms',
+                                                      'max ms', 'nodes', 'peak KiB'), file=out)
+    for key, result in sorted(data['results'].items()):
+        seconds = result['summary']['seconds']
+        peak = result['summary'].get('peak_bytes')
+        print('%-16s %8d %10.2f %10.2f %10.2f %10.2f %10d %12s' % (
+            key, result['problems'], seconds['p50'] * 1e3, seconds['p90'] * 1e3, seconds['p99'] * 1e3,
+            seconds['max'] * 1e3, result['summary']['nodes']['total'],
+            '%.1f' % (peak['max'] / 1024.0) if peak else '-'), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the solvers over the bundled problem sets.')
+    parser.add_argument('-c', '--corpus', nargs='+', choices=sorted(CORPORA), default=['easy', 'hard', 'hard16'])
+    parser.add_argument('-b', '--backend', nargs='+', choices=sorted(BACKENDS), default=['search'])
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT,
+                        help='runs per problem, the fastest one counts (default: %d)' % REPEAT)
+    parser.add_argument('-n', '--limit', type=int, help='only the first N problems of each set')
+    parser.add_argument('-i', '--imports', nargs='*', metavar='MODULE',
+                        help='measure how long importing these modules takes instead (default: %s)'
+                             % ' '.join(IMPORTS))
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run for peak memory')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('-t', '--times', action='store_true',
+                        help='also fail on times slower than the baseline by more than the tolerance. without it '
+                             'only the counters and the unsolved problems are compared')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='with --times, how much slower than the baseline a time may get, 0.25 being 25%%')
+    args = parser.parse_args(argv)
+
+    if args.imports is not None:
+        try:
+            data = {'meta': meta(args.repeat), 'imports': import_times(args.imports or IMPORTS, max(args.repeat, 5))}
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        data = run(args.corpus, args.backend, args.repeat, not args.no_memory, args.limit)
+    report(data)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(data, baseline, args.tolerance if args.times else None)
+        for line in found:
+            print('REGRESSION ' + line, file=sys.stderr)
+        if found:
+            return 1
+        print('no regressions against %s' % args.baseline, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+from __future__ import print_function
+from collections import OrderedDict
+from itertools import permutations, product
+
+from core import Grid, Solver, board_for
+
+# canonical forms are searched breadth first over the rows. a problem with so many symmetries that more
+# partial transforms than this tie is keyed as it is instead, which is still correct but misses its variants
+MAX_STATES = 2000
+
+
+# the relabeling, row and column moves and transposition that turn a problem into its canonical form
+# source[p] is the square of the problem that ends up at square p of the canonical form
+# labels maps every symbol of the problem to its symbol in the canonical form
+class Transform:
+    def __init__(self, board, source, labels):
+        self.board = board
+        self.source = source
+        self.labels = labels
+        self.inverse = dict((new, old) for old, new in labels.items())
+
+    def to_canonical(self, problem):
+        labels = self.labels
+        return ''.join(labels[problem[index]] for index in self.source)
+
+    def from_canonical(self, canonical):
+        inverse = self.inverse
+        out = [None] * len(canonical)
+        for position, index in enumerate(self.source):
+            out[index] = inverse[canonical[position]]
+        return ''.join(out)
+
+
+# the transform that leaves a problem as it is
+def identity(board):
+    labels = dict((c, c) for c in board.symbols)
+    labels['.'] = '.'
+    return Transform(board, list(range(board.squares)), labels)
+
+
+# True if no value is given twice in a row, column or house
+def consistent(values, board):
+    for unit in board.topology.unit_squares:
+        seen = [values[index] for index in unit if values[index]]
+        if len(seen) != len(set(seen)):
+            return False
+    return True
+
+
+# the canonical form of a problem and the transform to it. every problem that one of these turns into another
+# has the same canonical form: relabeling the values, swapping rows within a band, swapping bands,
+# the same for columns and stacks, and transposing when the houses are square.
+# the canonical form is the smallest of all the variants, read row-major with blanks first and the values
+# relabeled in order of appearance. it is itself a problem, and a transform of the original one,
+# so two problems only ever get the same form when they are variants of each other.
+# inconsistent problems, and the rare ones with too many ties, are their own canonical form
+def canonical(problem, board=None):
+    board = board or board_for(len(problem))
+    board.parse(problem)
+    size = board.size
+    value = dict((c, k + 1) for k, c in enumerate(board.symbols))
+    value['.'] = 0
+    values = [value[c] for c in problem]
+    if not consistent(values, board):
+        return problem, identity(board)
+    grids = [(False, [values[row * size:(row + 1) * size] for row in range(size)])]
+    if board.box_rows == board.box_cols:
+        grids.append((True, [values[col::size] for col in range(size)]))
+    best = search(grids, board)
+    if best is None:
+        return problem, identity(board)
+    (transposed, rows), items, labels = best
+    cols = []
+    for stacks, groups in items:
+        if groups is None:
+            groups = [stack_columns(stack, board) for stack in stacks]
+        for group in groups:
+            cols.extend(sorted(group))
+    # the values the problem doesn't give take the labels that are left, in order
+    for v in range(1, size + 1):
+        if v not in labels:
+            labels[v] = len(labels) + 1
+    symbols = board.symbols
+    relabel = dict((symbols[v - 1], symbols[label - 1]) for v, label in labels.items())
+    relabel['.'] = '.'
+    source = [col * size + row if transposed else row * size + col for row in rows for col in cols]
+    transform = Transform(board, source, relabel)
+    return transform.to_canonical(problem), transform
+
+
+def stack_columns(stack, board):
+    return tuple(range(stack * board.box_cols, (stack + 1) * board.box_cols))
+
+
+# breadth first search for the smallest variant, one row at a time
+# a state is ((transposed, rows chosen so far), column items, labels). column items are
+# (stacks, None) for stacks still interchangeable as a whole, which are blank in every row chosen so far,
+# or ((stack,), groups) for a stack in place, whose groups of columns are in place but free to reorder
+# within the group. a group of more than one column is blank in every row chosen so far.
+# labels maps the values seen so far to their labels.
+# returns the best state once every row is chosen, or None if too many of them tie
+def search(grids, board):
+    size = board.size
+    band = board.box_rows
+    stacks = tuple(range(size // board.box_cols))
+    states = [((transposed, ()), [(stacks, None)], {}) for transposed, _ in grids]
+    grid_of = dict(grids)
+    for level in range(size):
+        best = None
+        ties = []
+        for state in states:
+            (transposed, rows), items, labels = state
+            grid = grid_of[transposed]
+            for row in next_rows(rows, level, band, size, grid):
+                tokens = arrange(grid[row], items, labels, board, False)
+                if best is None or tokens < best:
+                    best = tokens
+                    ties = []
+                if tokens == best:
+                    ties.append((state, row))
+        states = []
+        for ((transposed, rows), items, labels), row in ties:
+            for new_items, new_labels in arrange(grid_of[transposed][row], items, labels, board, True):
+                states.append(((transposed, rows + (row,)), new_items, new_labels))
+            if len(states) > MAX_STATES:
+                return None
+    return states[0]
+
+
+# the rows that can come next: any row of a band not used yet when a band starts, otherwise the rest of the
+# band of the last row. of identical rows in a band only the first is tried, the others lead to the same forms
+def next_rows(rows, level, band, size, grid):
+    if level % band:
+        first = rows[-1] // band * band
+        candidates = range(first, first + band)
+    else:
+        used = set(row // band for row in rows)
+        candidates = [row for row in range(size) if row // band not in used]
+    seen = set()
+    for row in candidates:
+        if row in rows:
+            continue
+        key = (row // band, tuple(grid[row]))
+        if key not in seen:
+            seen.add(key)
+            yield row
+
+
+# place one row under the column items: every group and interchangeable stack is put in the order that makes
+# the row smallest, blanks, then values already labeled, then new values.
+# returns the row as labels, 0 for blanks and size + 1 for new values, or with expand the list of every
+# (items, labels) the row can leave behind. they differ in the order of the new values, which all read the same
+def arrange(row, items, labels, board, expand):
+    new = board.size + 1
+    tokens = []
+    options = []
+    for stacks, groups in items:
+        if groups is None:
+            # interchangeable stacks: place each one's columns, then order the stacks by how they read
+            placed = sorted((place(row, stack_columns(stack, board), labels, new), stack) for stack in stacks)
+            blank = [stack for (sub, _), stack in placed if not any(sub)]
+            for (sub, _), _ in placed:
+                tokens.extend(sub)
+            if expand:
+                options.append(list(stack_options(placed, blank, row, labels, new, board)))
+            continue
+        item_options = []
+        for group in groups:
+            sub, group_options = place(row, group, labels, new)
+            tokens.extend(sub)
+            item_options.append(group_options)
+        if expand:
+            options.append([[(stacks, sum(choice, ()))] for choice in product(*item_options)])
+    if not expand:
+        return tokens
+    results = []
+    for choice in product(*options):
+        new_items = []
+        new_labels = dict(labels)
+        for part in choice:
+            new_items.extend(part)
+        # new values take the next labels in the order they come up
+        for stacks, groups in new_items:
+            if groups is None:
+                continue
+            for group in groups:
+                for col in group:
+                    v = row[col]
+                    if v and v not in new_labels:
+                        new_labels[v] = len(new_labels) + 1
+        results.append((new_items, new_labels))
+    return results
+
+
+# the smallest reading of a row over a group of columns that can be put in any order, and every way of getting it:
+# the blanks stay together as one group, labeled values come in order of their labels, and new values in any order
+def place(row, group, labels, new):
+    if len(group) == 1:
+        v = row[group[0]]
+        return [labels.get(v, new) if v else 0], [((group[0],),)]
+    blanks = tuple(col for col in group if not row[col])
+    known = sorted((labels[row[col]], col) for col in group if row[col] in labels)
+    unknown = [col for col in group if row[col] and row[col] not in labels]
+    tokens = [0] * len(blanks) + [label for label, _ in known] + [new] * len(unknown)
+    head = ((blanks,) if blanks else ()) + tuple((col,) for _, col in known)
+    return tokens, [head + tuple((col,) for col in order) for order in permutations(unknown)]
+
+
+# the items that interchangeable stacks can become once a row is placed. stacks that are still blank stay
+# interchangeable, the others go in place in every order that reads the same
+def stack_options(placed, blank, row, labels, new, board):
+    parts = []
+    if blank:
+        parts.append([[(tuple(blank), None)] if len(blank) > 1 else
+                      [((blank[0],), (stack_columns(blank[0], board),))]])
+    # stacks that read the same can go in either order
+    runs = []
+    for (sub, groups), stack in placed:
+        if stack in blank:
+            continue
+        if runs and runs[-1][0] == sub:
+            runs[-1][1].append((stack, groups))
+        else:
+            runs.append((sub, [(stack, groups)]))
+    for _, run in runs:
+        run_options = []
+        for order in permutations(run):
+            for choice in product(*[groups for _, groups in order]):
+                run_options.append([((stack,), groups) for (stack, _), groups in zip(order, choice)])
+        parts.append(run_options)
+    for choice in product(*parts):
+        items = []
+        for part in choice:
+            items.extend(part)
+        yield items
+
+
+# the least recently used entries in memory, dropped once there are more than capacity of them
+class MemoryStore:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        solution = self.entries.pop(key)
+        self.entries[key] = solution
+        return solution
+
+    def put(self, key, solution):
+        self.entries.pop(key, None)
+        self.entries[key] = solution
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        pass
+
+
+# the same in a SQLite file, so the solutions outlive the process and can be shared between processes.
+# every entry keeps the stamp of its last use and the oldest ones go first
+class SqliteStore:
+    def __init__(self, capacity, path):
+        # imported here, so the processes that never open a store don't pay for loading sqlite
+        import sqlite3
+        self.capacity = capacity
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS solutions '
+                        '(key TEXT PRIMARY KEY, solution TEXT NOT NULL, used INTEGER NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+        self.stamp, self.count = self.db.execute('SELECT COALESCE(MAX(used), 0), COUNT(*) FROM solutions').fetchone()
+
+    def get(self, key):
+        row = self.db.execute('SELECT solution FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self.stamp += 1
+        self.db.execute('UPDATE solutions SET used = ? WHERE key = ?', (self.stamp, key))
+        return row[0]
+
+    def put(self, key, solution):
+        self.stamp += 1
+        self.db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)', (key, solution, self.stamp))
+        self.count += 1
+        if self.count > self.capacity:
+            # other processes may be writing too, so count again before dropping anything
+            self.count = self.db.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+            if self.count > self.capacity:
+                self.db.execute('DELETE FROM solutions WHERE key IN '
+                                '(SELECT key FROM solutions ORDER BY used LIMIT ?)', (self.count - self.capacity,))
+                self.count = self.capacity
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+# solve the problem with the backtracking search and return the solution as a string, or None
+def search_solve(problem):
+    grid = Grid(problem)
+    solver = Solver(grid)
+    if solver.solve():
+        return grid.board.to_string(solver.solution)
+    return None
+
+
+# solutions of canonical forms, so that a problem seen before, or any variant of it, isn't solved again.
+# path is a SQLite file to keep them in, or None to keep them in memory. solve is the function that solves
+# a problem on a miss, such as batch.solve_one, and returns the solution string or None.
+# the last recent problems are also kept as they are, so an exact repeat doesn't even need its canonical form
+class SolutionCache:
+    def __init__(self, capacity=100000, path=None, solve=search_solve, recent=1024):
+        self.store = MemoryStore(capacity) if path is None else SqliteStore(capacity, path)
+        self.recent = MemoryStore(recent)
+        self.solve_problem = solve
+        self.hits = 0
+        self.misses = 0
+
+    # the solution of a problem, solving it only if neither it nor a variant of it has been solved before
+    def solve(self, problem):
+        try:
+            solution = self.recent.get(problem)
+            self.hits += 1
+            return solution
+        except KeyError:
+            pass
+        solution = self.lookup(problem)
+        self.recent.put(problem, solution)
+        return solution
+
+    def lookup(self, problem):
+        key, transform = canonical(problem)
+        try:
+            solution = self.store.get(key)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            solution = self.solve_problem(key) or ''
+            self.store.put(key, solution)
+        # an empty solution stands for a problem with no solution
+        if not solution:
+            return None
+        return transform.from_canonical(solution)
+
+    def __len__(self):
+        return len(self.store)
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
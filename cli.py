@@ -0,0 +1,44 @@
+from __future__ import print_function
+import argparse, sys
+
+from core import Grid, Solver
+from puzzle_io import BUFFER, CORPORA, FORMATS, ResultWriter, corpus, read_puzzles
+
+
+# the problems of every source, a bundled set by name or a problem file
+def problems_of(sources):
+    for source in sources:
+        if source in CORPORA:
+            for problem in corpus(source):
+                yield problem
+        else:
+            for problem in read_puzzles(source):
+                yield problem
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve sudoku and hexadoku problems and print them with their '
+                                                 'solutions.')
+    parser.add_argument('sources', nargs='*', default=['easy'],
+                        help="bundled sets (%s) or problem files, '-' for stdin" % ', '.join(sorted(CORPORA)))
+    parser.add_argument('-f', '--format', choices=FORMATS, default='pretty',
+                        help='the problem and solution grids, a solution line, a JSON line with the search stats, '
+                             'or packed binary records (default: pretty)')
+    parser.add_argument('-l', '--lines', action='store_const', dest='format', const='line', help='same as -f line')
+    parser.add_argument('-o', '--output', default='-', help='file for the results, .gz to compress (default: stdout)')
+    parser.add_argument('-B', '--buffer', type=int, default=BUFFER,
+                        help='bytes of results to gather before writing them out (default: %d)' % BUFFER)
+    args = parser.parse_args(argv)
+
+    unsolved = 0
+    with ResultWriter(args.output, args.format, buffer=args.buffer) as writer:
+        for index, problem in enumerate(problems_of(args.sources)):
+            s = Solver(Grid(problem))
+            solved = s.solve()
+            unsolved += not solved
+            writer.write(index, s.board.to_string(s.solution) if solved else None, problem, s.stats)
+    return 1 if unsolved else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
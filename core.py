@@ -0,0 +1,846 @@
+from __future__ import print_function
+import random
+from array import array
+from collections import OrderedDict
+from time import time
+from timeit import default_timer
+from rules import RULES, DEFAULT_RULES
+from topology import topology
+
+# default alphabets. boards up to 35 values count from 1 like sudoku, hexadoku and boards over 35 count from 0
+FROM_ONE = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+FROM_ZERO = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+# the largest board that gets a lookup table for popcounts, bigger boards count the bits of each mask
+TABLE_SIZE = 16
+# the search looks at the clock once every this many propagations on a 9x9 board. a propagation costs about as
+# much as the board has squares, so bigger boards look at it proportionally more often
+CLOCK_EVERY = 256
+# backtracks before the first restart, and how much longer each geometric run is than the one before
+RESTART_BASE = 32
+GEOMETRIC = 1.5
+# the counters of a search: nodes of the search tree, guesses among them, backtracks, calls to prune_it,
+# candidates removed, solutions found, restarts, guesses skipped by backjumping, guesses a learned nogood ruled out,
+# and the peak trail length and stack depth
+STATS = ('nodes', 'guesses', 'backtracks', 'propagations', 'eliminations', 'solutions', 'restarts', 'backjumps',
+         'nogoods', 'peak_trail', 'max_depth')
+# the most guesses a learned nogood may have, longer ones are too specific to come up again
+MAX_NOGOOD = 8
+
+
+# number of candidates left in a mask, for boards too big for a table
+class PopCount:
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+# the shape and alphabet of one board size: houses of box_rows by box_cols squares, so
+# box_rows * box_cols rows, columns, houses and values. symbols[k] is the character of candidate bit k
+class Board:
+    def __init__(self, box_rows, box_cols=None, symbols=None):
+        box_cols = box_cols or box_rows
+        self.box_rows = box_rows
+        self.box_cols = box_cols
+        self.size = size = box_rows * box_cols
+        self.squares = size * size
+        if symbols is None:
+            if size == 16 or size > len(FROM_ONE):
+                symbols = FROM_ZERO[:size]
+            else:
+                symbols = FROM_ONE[:size]
+        if len(symbols) != size or len(set(symbols)) != size or '.' in symbols:
+            raise ValueError('a board of %d values needs %d distinct symbols other than ., got %r'
+                             % (size, size, symbols))
+        self.symbols = symbols
+        # the value of each candidate bit in the {(row, col): [values]} view, 1 to 9 for sudoku and 0 to 15 for hexadoku
+        try:
+            self.digits = [int(c, 36) for c in symbols] if size <= 36 else list(range(size))
+        except ValueError:
+            self.digits = list(range(1, size + 1))
+        self.all = (1 << size) - 1      # candidate mask of a blank square
+        # the (row, col) pair of every square, shared by every grid of this board
+        self.spots = tuple((i, j) for i in range(1, size + 1) for j in range(1, size + 1))
+        # the smallest array type that holds a candidate mask, for storing masks compactly
+        self.typecode = 'H' if size <= 16 else 'L' if size <= 32 else 'Q'
+        self.topology = topology(box_rows, box_cols)
+
+    # number of candidates left in every possible mask, built on first use. the hexadoku table has 65536
+    # entries, which would otherwise be paid for by every import of a module that sets up a board
+    def __getattr__(self, name):
+        if name != 'popcount':
+            raise AttributeError(name)
+        self.popcount = [bin(mask).count('1') for mask in range(self.all + 1)] if self.size <= TABLE_SIZE \
+            else PopCount()
+        return self.popcount
+
+    # candidate masks of a problem string, one character per square in row-major order and '.' for blanks
+    def parse(self, problem):
+        if len(problem) != self.squares:
+            raise ValueError('a %dx%d problem has %d squares, got %d' % (self.size, self.size, self.squares,
+                                                                       len(problem)))
+        index = {c: 1 << k for k, c in enumerate(self.symbols)}
+        index['.'] = self.all
+        try:
+            return [index[c] for c in problem]
+        except KeyError as e:
+            raise ValueError('unknown symbol %s in problem' % e)
+
+    # one character per square in row-major order, the same format as the problems. unsettled squares are '.'
+    def to_string(self, cells):
+        symbols = self.symbols
+        popcount = self.popcount
+        return ''.join(symbols[mask.bit_length() - 1] if popcount[mask] == 1 else '.' for mask in cells)
+
+    # convert a flat list of candidate masks into the old {(row, col): [values]} view
+    def to_domains(self, cells):
+        size = self.size
+        digits = self.digits
+        domains = {}
+        for index, mask in enumerate(cells):
+            domains[(index // size + 1, index % size + 1)] = [digits[k] for k in range(size) if mask >> k & 1]
+        return domains
+
+    # convert the {(row, col): [values]} view back into a flat list of candidate masks
+    def from_domains(self, domains):
+        size = self.size
+        cells = [0] * self.squares
+        for (row, col), values in domains.items():
+            for value in values:
+                cells[(row - 1) * size + col - 1] |= 1 << self.digits.index(value)
+        return cells
+
+    # the grid of candidate masks as one string, with the houses set apart. squares that are not settled are '.'
+    def pretty(self, cells):
+        size = self.size
+        symbols = self.symbols
+        popcount = self.popcount
+        border = '-' * (size + (size // self.box_cols - 1) * 3) + '\n'
+        lines = []
+        for i in range(size):
+            row = cells[i * size:(i + 1) * size]
+            chars = [symbols[mask.bit_length() - 1] if popcount[mask] == 1 else '.' for mask in row]
+            lines.append(' | '.join(''.join(chars[j:j + self.box_cols]) for j in range(0, size, self.box_cols)) + '\n')
+            if i % self.box_rows == self.box_rows - 1 and i != size - 1:
+                lines.append(border)
+        return ''.join(lines)
+
+    # print a grid of candidate masks, squares that are not settled are shown as blanks
+    def display(self, cells):
+        print(self.pretty(cells), end='')
+
+    # candidate masks packed into bytes: the position of every settled value counting from 1, or 0 for a square
+    # that isn't settled, in as few bits as that takes, 4 for sudoku and 5 for hexadoku, first square first
+    def pack(self, cells):
+        bits = self.size.bit_length()
+        popcount = self.popcount
+        number = 0
+        for mask in cells:
+            number = number << bits | (mask.bit_length() if popcount[mask] == 1 else 0)
+        return number.to_bytes(self.packed_size, 'big')
+
+    # candidate masks of bytes made by pack
+    def unpack(self, data):
+        bits = self.size.bit_length()
+        number = int.from_bytes(data, 'big')
+        field = (1 << bits) - 1
+        cells = []
+        for shift in range((self.squares - 1) * bits, -1, -bits):
+            value = number >> shift & field
+            cells.append(1 << (value - 1) if value else self.all)
+        return cells
+
+    # bytes of one packed grid
+    @property
+    def packed_size(self):
+        return -(-self.squares * self.size.bit_length() // 8)
+
+
+_boards = {}
+
+
+# the shared board of a shape and alphabet, built once per process
+def board(box_rows, box_cols=None, symbols=None):
+    key = (box_rows, box_cols or box_rows, symbols)
+    if key not in _boards:
+        _boards[key] = Board(box_rows, box_cols, symbols)
+    return _boards[key]
+
+
+# the board a problem of this many squares is for. the houses are as square as the size allows,
+# so 36 squares is a 6x6 board of 2x3 houses and 144 a 12x12 board of 3x4 houses
+def board_for(squares):
+    size = int(round(squares ** 0.5))
+    if size * size != squares:
+        raise ValueError('%d squares is not a square board' % squares)
+    box_rows = int(size ** 0.5)
+    while size % box_rows:
+        box_rows -= 1
+    return board(box_rows, size // box_rows)
+
+
+class Grid:
+    # the board is worked out from the length of the problem unless it is given
+    def __init__(self, problem, board=None):
+        self.board = board or board_for(len(problem))
+        # create an empty grid
+        self.spots = self.board.spots
+        # candidate bitmask of each square in row-major order. bit k set means board.symbols[k] is still possible
+        self.cells = [self.board.all] * self.board.squares
+        self.peers = {}     # dictionary that maps each spot to its peers
+        self.parse(problem)     # read the initial layout from a problem
+
+    # all the possible values for each spot, kept for the code written against the dictionary of lists
+    @property
+    def domains(self):
+        return self.board.to_domains(self.cells)
+
+    # all the index in this program starts from 1
+    def parse(self, problem):
+        self.cells = self.board.parse(problem)
+
+    def display(self):
+        self.board.display(self.cells)
+
+
+# the i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ...
+def luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+############################################################
+
+
+# the sets of guesses that led the search into a dead end, so it doesn't guess its way into them again after a
+# restart. a nogood is a tuple of (square, value bit) pairs that can't all hold together. the store keeps at most
+# capacity of them and forgets the one that went the longest without ruling anything out.
+# a nogood only holds for the candidate masks the search started from, so the store keeps them as its root
+class Nogoods:
+    def __init__(self, capacity, root=None):
+        self.capacity = capacity
+        self.root = list(root) if root is not None else None
+        self.entries = OrderedDict()
+        self.by_guess = {}      # (square, value bit) -> the nogoods it is in
+
+    def add(self, guesses):
+        key = tuple(sorted(guesses))
+        if len(key) > MAX_NOGOOD:
+            return
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        self.entries[key] = True
+        for guess in key:
+            self.by_guess.setdefault(guess, set()).add(key)
+        if len(self.entries) > self.capacity:
+            old, _ = self.entries.popitem(last=False)
+            for guess in old:
+                self.by_guess[guess].discard(old)
+
+    # True if putting value at index completes a nogood, every other square of it having its value in cells
+    def rules_out(self, cells, index, value):
+        for key in self.by_guess.get((index, value), ()):
+            if all(cells[i] == v for i, v in key if i != index):
+                self.entries.move_to_end(key)
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# what a search under a budget came to. status is 'solved', 'unsolvable', 'timeout' or 'node_limit'.
+# solution is the solution as a one-line string, one byte per square, or None.
+# the masks of the most settled state the search got to, which is the solution when solved and the givens when
+# unsolvable, are kept in an array and the counters in a tuple, and both turn back into lists and dicts on demand,
+# so that millions of results fit in memory
+class Result:
+    __slots__ = ('board', 'status', 'solution', 'packed_partial', 'packed_stats', 'attempts')
+
+    def __init__(self, board, status, solution, partial, stats, attempts):
+        self.board = board
+        self.status = status
+        self.solution = solution
+        self.packed_partial = array(board.typecode, partial)
+        self.packed_stats = tuple(stats[key] for key in STATS)
+        self.attempts = attempts
+
+    # the counters of every attempt added up
+    @property
+    def stats(self):
+        return dict(zip(STATS, self.packed_stats))
+
+    # the candidate masks of the most settled state
+    @property
+    def partial(self):
+        return self.packed_partial.tolist()
+
+    # the candidate masks of the solution, or None
+    @property
+    def cells(self):
+        return self.board.parse(self.solution) if self.solution is not None else None
+
+    # True if the search ran out of time or nodes before it could tell
+    @property
+    def exceeded(self):
+        return self.status in ('timeout', 'node_limit')
+
+    # the partial candidates in the {(row, col): [values]} view
+    @property
+    def domains(self):
+        return self.board.to_domains(self.partial)
+
+    # the solution in the {(row, col): [value]} view, or None
+    @property
+    def solution_domains(self):
+        return self.board.to_domains(self.cells) if self.solution is not None else None
+
+
+class Solver:
+    # tie_break picks among the unsettled squares with the fewest candidates:
+    # 'any' whichever the bucket yields first, in constant time, 'first' the lowest square, which keeps the order
+    # of the squares but looks at every square of the bucket, 'degree' the one with the most unsettled peers,
+    # which also counts the peers of each of them, and 'random' one of them at random from seed
+    # value_order picks the value to guess first: 'last' the highest candidate, 'first' the lowest,
+    # 'lcv' the least constraining one, which the fewest unsettled peers could take, or 'random'
+    # restarts is None, 'luby' or 'geometric': the schedule of backtracks after which the search gives up
+    # its guesses and starts again from the givens. it is only worth it with a random tie_break or value_order,
+    # and only applies until the first solution
+    # rules names the propagation rules to run after the settled values are removed from their peers,
+    # out of hidden_singles, naked_pairs, pointing, naked_triples and x_wing
+    # hooks is any object with some of the methods on_guess(solver, index, value, depth),
+    # on_contradiction(solver, index, depth) and on_solution(solver, cells), called from the search.
+    # the ones it doesn't have cost nothing
+    # deadline is a time.time() after which the search gives up with status 'timeout'. it is wall clock time
+    # so that it means the same in a worker process as where it was set.
+    # max_nodes is the number of nodes after which it gives up with status 'node_limit'
+    # backjump keeps, for every candidate removed, the guesses it was removed because of, so a dead end takes back
+    # the latest guess it came from rather than the latest guess. nogoods is the number of the sets of guesses
+    # behind those dead ends to remember, which only pays off with restarts, when the search comes back by them
+    def __init__(self, grid, tie_break='any', rules=DEFAULT_RULES, hooks=None, deadline=None, max_nodes=None,
+                 seed=None, value_order='last', restarts=None, backjump=False, nogoods=0):
+        # sigma is the assignment function
+        self.grid = grid
+        self.solution = None
+        self.board = grid.board
+        # rows, columns, houses and peers as flat indexes, shared by every solver of this size
+        self.topology = self.board.topology
+        self.peer_index = self.topology.peers   # index of every peer of each square
+        self.trail = []         # (square, old mask) for every change made since the search started
+        self.stats = self.new_stats()   # counters of the last search
+        self.tie_break = tie_break
+        # buckets[n] holds the squares with n candidates left, kept up to date on every change
+        self.buckets = [set() for _ in range(self.board.size + 1)]
+        known = dict(RULES)
+        for name in rules:
+            if name not in known:
+                raise ValueError('unknown propagation rule %r, pick from %s' % (name, ', '.join(known)))
+        # the chosen rules in the order of RULES, cheapest first
+        self.rules = [(name, rule) for name, rule in RULES if name in rules]
+        self.pending = []       # settled squares whose value hasn't been removed from their peers yet
+        self.eliminated = 0     # candidates removed so far
+        # calls, eliminations and seconds spent for every rule, 'peers' being the removal of settled values
+        self.rule_stats = self.new_rule_stats()
+        self.hooks = hooks
+        self.on_guess = getattr(hooks, 'on_guess', None)
+        self.on_contradiction = getattr(hooks, 'on_contradiction', None)
+        self.on_solution = getattr(hooks, 'on_solution', None)
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.status = None      # 'solved', 'unsolvable', 'timeout' or 'node_limit' once a search is over
+        self.best = None        # the most settled candidates of the last search under a budget
+        self.frontier = []      # what the last search left unexplored when it gave up, see unexplored
+        self.rng = random.Random(seed)
+        if tie_break not in ('any', 'first', 'degree', 'random'):
+            raise ValueError('unknown tie break %r' % tie_break)
+        if value_order not in ('last', 'first', 'lcv', 'random'):
+            raise ValueError('unknown value order %r' % value_order)
+        if restarts not in (None, 'luby', 'geometric'):
+            raise ValueError('unknown restart schedule %r' % restarts)
+        self.value_order = value_order
+        self.restarts = restarts
+        self.backjump = backjump or bool(nogoods)
+        self.nogoods = Nogoods(nogoods) if nogoods else None
+        # with backjump, reasons[index][k] is the bitmask of the levels of the guesses that removed value k from
+        # the square, level n being the nth guess on domain_stack, and levels has the bit of every level so far
+        self.reasons = None
+        self.levels = 0
+        self.conflict = None    # the levels a failed prune_it came from, when it knows them
+
+    def solve(self):
+        spots = self.grid.spots
+        cells = list(self.grid.cells)
+        # find the solution by backtracking and return it
+        return self.backtracking_search(spots, cells)
+
+    # solve under a budget of max_nodes nodes per attempt and seconds in all, and return a Result.
+    # a search that runs out of nodes is tried again up to retries times, picking among the squares with the
+    # fewest candidates at random, since a search that goes badly often goes badly because of its first choices
+    def solve_within(self, max_nodes=None, seconds=None, retries=0):
+        deadline = time() + seconds if seconds is not None else None
+        tie_break = self.tie_break
+        totals = dict.fromkeys(self.new_stats(), 0)
+        partial = None
+        attempt = 0
+        try:
+            self.deadline = deadline
+            self.max_nodes = max_nodes
+            while True:
+                attempt += 1
+                solved = self.solve()
+                for key, value in self.stats.items():
+                    totals[key] = max(totals[key], value) if key.startswith(('peak', 'max')) else totals[key] + value
+                if self.best is not None and (partial is None or self.settled(self.best) > self.settled(partial)):
+                    partial = self.best
+                if self.status != 'node_limit' or attempt > retries:
+                    break
+                self.tie_break = 'random'
+        finally:
+            self.tie_break = tie_break
+            self.deadline = self.max_nodes = None
+        if partial is None:
+            partial = list(self.solution)
+        return Result(self.board, self.status, self.board.to_string(self.solution) if solved else None, partial,
+                      totals, attempt)
+
+    # number of settled squares of a list of candidate masks
+    def settled(self, cells):
+        popcount = self.board.popcount
+        return sum(popcount[mask] == 1 for mask in cells)
+
+    # yield every solution in turn as a list of candidate masks, searching on for the next one only when asked.
+    # the search stops wherever the caller stops taking them
+    def iter_solutions(self):
+        for cells in self.search(list(self.grid.cells)):
+            yield list(cells)
+
+    # the number of solutions, counting no further than limit when there is one.
+    # count_solutions(limit=2) == 1 tells a puzzle with a unique solution.
+    # cells counts the solutions of other candidate masks of the same board with this solver instead of the grid's
+    def count_solutions(self, limit=None, cells=None):
+        count = 0
+        for _ in self.search(list(self.grid.cells if cells is None else cells)):
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    # build up the (row, col) views of the rows, columns, houses and peers from the topology.
+    # the search itself only needs the flat indexes and doesn't call this, so rows, cols and houses only exist
+    # once it has been called
+    def find_peers(self):
+        spots = self.grid.spots
+        size = self.board.size
+        stacks = size // self.board.box_cols
+        units = [[spots[index] for index in unit] for unit in self.topology.unit_squares]
+        # dummy row and column for index 0
+        self.rows = [[]] + units[:size]
+        self.cols = [[]] + units[size:2 * size]
+        self.houses = {}
+        for house in range(size):
+            self.houses[(house // stacks + 1, house % stacks + 1)] = units[2 * size + house]
+        for index, spot in enumerate(spots):
+            self.grid.peers[spot] = [spots[peer] for peer in self.peer_index[index]]
+        return
+
+    # position of a (row, col) spot in the flat list of candidate masks
+    def index(self, spot):
+        return (spot[0] - 1) * self.board.size + spot[1] - 1
+
+    # cells is a list of candidate masks, one per square in row-major order. it is changed in place
+    # spots is a collection of pairs each indicating a row and a column, 81 of them for sudoku
+    def backtracking_search(self, spots, cells):
+        for _ in self.search(cells):
+            return True
+        return False
+
+    # yield cells every time it holds a solution, then go on backtracking from there for the next one
+    # once the search is over, cells is back to the original domains and self.solution is set to it
+    def search(self, cells):
+        self.reset(cells)
+        trail = self.trail
+        # every frame is the trail length before a guess, the guessed square and the guessed value
+        domain_stack = []
+        stats = self.stats
+        popcount = self.board.popcount
+        buckets = self.buckets
+        on_guess = self.on_guess
+        on_contradiction = self.on_contradiction
+        deadline = self.deadline
+        max_nodes = self.max_nodes
+        clock_every = max(1, CLOCK_EVERY * 81 // self.board.squares)
+        next_clock = clock_every
+        self.status = None
+        # under a budget, keep the most settled state so far for the caller to carry on from
+        budget = deadline is not None or max_nodes is not None
+        most_settled = -1
+        best = self.best = None
+        value_order = self.value_order
+        restart_at = self.restart_cutoff(1) if self.restarts else None
+        backjump = self.backjump
+        nogoods = self.nogoods
+        # settle everything the givens already imply
+        index = -1
+        pruned_cells = self.prune_it(cells, index)
+        root = len(trail)
+        while True:
+            # if the current assignments don't violate any constraint
+            if pruned_cells:
+                if len(trail) > stats['peak_trail']:
+                    stats['peak_trail'] = len(trail)
+                if budget and len(buckets[1]) > most_settled:
+                    most_settled = len(buckets[1])
+                    best = self.best = list(cells)
+                # find an unsettled square with the fewest candidates
+                index = self.select_square(cells)
+                # end the algorithm if all the squares have a fixed value
+                if index < 0:
+                    stats['eliminations'] = self.eliminated
+                    stats['solutions'] += 1
+                    self.status = 'solved'
+                    self.solution = cells
+                    if self.on_solution is not None:
+                        self.on_solution(self, cells)
+                    yield cells
+                    # look for the next solution by backtracking as from a dead end, without calling it a contradiction
+                    pruned_cells = None
+                    continue
+                # cooperative cancellation: give up once past the deadline
+                if deadline is not None and stats['propagations'] >= next_clock:
+                    next_clock = stats['propagations'] + clock_every
+                    if time() > deadline:
+                        self.status = 'timeout'
+                        break
+                if max_nodes is not None and stats['nodes'] >= max_nodes:
+                    self.status = 'node_limit'
+                    break
+                mask = cells[index]
+                if value_order == 'last':
+                    value_to_try = 1 << (mask.bit_length() - 1)
+                else:
+                    value_to_try = self.pick_value(cells, index, mask)
+                # a learned nogood says the guess can't work with the squares as they are. drop the value as if the
+                # guess had failed because of every guess so far
+                if nogoods is not None and nogoods.rules_out(cells, index, value_to_try):
+                    stats['nogoods'] += 1
+                    mask &= ~value_to_try
+                    self.set_mask(cells, index, mask)
+                    self.explain(index, value_to_try, self.levels)
+                    pruned_cells = self.prune_it(cells, index) if popcount[mask] == 1 else cells
+                    continue
+                # possibility 1: the last value in the spot's domain works. remember where to come back to
+                domain_stack.append((len(trail), index, value_to_try))
+                stats['nodes'] += 1
+                stats['guesses'] += 1
+                if len(domain_stack) > stats['max_depth']:
+                    stats['max_depth'] = len(domain_stack)
+                if on_guess is not None:
+                    on_guess(self, index, value_to_try, len(domain_stack))
+                self.set_mask(cells, index, value_to_try)
+                if backjump:
+                    self.levels = (1 << (len(domain_stack) + 1)) - 2
+                    self.explain(index, mask & ~value_to_try, 1 << len(domain_stack))
+                pruned_cells = self.prune_it(cells, index)
+                continue
+            if on_contradiction is not None and pruned_cells is not None:
+                on_contradiction(self, index, len(domain_stack))
+            if backjump:
+                # the levels of the guesses the dead end came from. after a solution that is every guess,
+                # so the search goes on to the next solution as it would without backjumping
+                conflict = self.levels if pruned_cells is None or self.conflict is None else self.conflict
+                # the latest of them gets taken back, the guesses after it had nothing to do with the dead end.
+                # with none of them the dead end follows from the givens, and the search is over
+                level = conflict.bit_length() - 1 if conflict else 0
+                # after a solution, a branch counts as ruled out once it has been searched, which only holds for
+                # this search. what is learned then would rule out solutions of the next search from the same givens
+                if nogoods is not None and pruned_cells is not None and conflict and not stats['solutions']:
+                    nogoods.add(domain_stack[k - 1][1:] for k in range(1, level + 1) if conflict >> k & 1)
+                stats['backjumps'] += len(domain_stack) - level
+                del domain_stack[level:]
+                # the other branch of that guess is ruled out by the rest of them
+                refuted = conflict & ~(1 << level)
+            # there's no guess left to take back, the problem is unsolvable
+            if not domain_stack:
+                break
+            # time for a restart: drop every guess and start again from the givens with the next cutoff
+            if restart_at is not None and stats['backtracks'] >= restart_at and not stats['solutions']:
+                self.undo(cells, root)
+                del domain_stack[:]
+                stats['restarts'] += 1
+                restart_at = stats['backtracks'] + self.restart_cutoff(stats['restarts'] + 1)
+                self.levels = 0
+                pruned_cells = cells
+                continue
+            # possibility 2: the guess doesn't work. take it back and remove it from the domain
+            mark, index, value_tried = domain_stack.pop()
+            stats['backtracks'] += 1
+            self.undo(cells, mark)
+            mask = cells[index] & ~value_tried
+            self.set_mask(cells, index, mask)
+            if backjump:
+                self.levels = (1 << (len(domain_stack) + 1)) - 2
+                self.explain(index, value_tried, refuted)
+            # the other branch of the guess is a node of its own
+            stats['nodes'] += 1
+            if popcount[mask] == 1:
+                pruned_cells = self.prune_it(cells, index)
+            else:
+                pruned_cells = cells
+        # if the problem is unsolvable, return the original domains
+        stats['eliminations'] = self.eliminated
+        if self.status is None:
+            self.status = 'unsolvable'
+        elif self.status in ('timeout', 'node_limit'):
+            self.frontier = self.unexplored(cells, domain_stack)
+        self.undo(cells, 0)
+        if budget and best is None:
+            self.best = list(cells)
+        self.solution = cells
+
+    # an empty trail, fresh counters and the buckets of cells, to search or propagate from cells
+    def reset(self, cells):
+        self.trail = []
+        self.frontier = []
+        self.levels = 0
+        # what was learned from other givens would rule out solutions of these
+        if self.nogoods is not None and self.nogoods.root != cells:
+            self.nogoods = Nogoods(self.nogoods.capacity, cells)
+        if self.backjump:
+            # what the problem starts with comes from no guess at all
+            self.reasons = [[0] * self.board.size for _ in cells]
+        self.stats = self.new_stats()
+        self.eliminated = 0
+        self.rule_stats = self.new_rule_stats()
+        popcount = self.board.popcount
+        self.buckets = [set() for _ in range(self.board.size + 1)]
+        for i, mask in enumerate(cells):
+            self.buckets[popcount[mask]].add(i)
+
+    # the parts of the search tree a search that gave up didn't get to, as candidate masks to search each one
+    # from: the node it stopped at, then the other branch of every guess on domain_stack, the deepest first.
+    # together with the solutions it found they cover the whole tree, so searching them carries on where it left off
+    def unexplored(self, cells, domain_stack):
+        parts = [list(cells)]
+        for mark, index, value_tried in reversed(domain_stack):
+            self.undo(cells, mark)
+            part = list(cells)
+            part[index] &= ~value_tried
+            parts.append(part)
+        return parts
+
+    # the unsettled square with the fewest candidates, or -1 if every square is settled
+    def select_square(self, cells):
+        buckets = self.buckets
+        for count in range(2, len(buckets)):
+            bucket = buckets[count]
+            if bucket:
+                if self.tie_break == 'any':
+                    return next(iter(bucket))
+                if self.tie_break == 'first':
+                    return min(bucket)
+                if self.tie_break == 'degree':
+                    peer_index = self.peer_index
+                    popcount = self.board.popcount
+                    # ties go to the lowest square
+                    return max(bucket, key=lambda i: (sum(popcount[cells[peer]] > 1 for peer in peer_index[i]), -i))
+                return self.rng.choice(sorted(bucket))
+        return -1
+
+    # the value to guess first out of a square's candidates, by value_order
+    def pick_value(self, cells, index, mask):
+        if self.value_order == 'first':
+            return mask & -mask
+        values = [1 << k for k in range(mask.bit_length()) if mask >> k & 1]
+        if self.value_order == 'random':
+            return self.rng.choice(values)
+        # least constraining: the value the fewest unsettled peers still have. ties go to the highest
+        popcount = self.board.popcount
+        open_peers = [cells[peer] for peer in self.peer_index[index] if popcount[cells[peer]] > 1]
+        return min(reversed(values), key=lambda value: sum(1 for peer in open_peers if peer & value))
+
+    # backtracks allowed in the n-th run (from 1) between restarts
+    def restart_cutoff(self, n):
+        if self.restarts == 'luby':
+            return RESTART_BASE * luby(n)
+        return int(RESTART_BASE * GEOMETRIC ** (n - 1))
+
+    # change the candidates of a square, recording the old mask on the trail
+    def set_mask(self, cells, index, mask):
+        old = cells[index]
+        popcount = self.board.popcount
+        self.trail.append((index, old))
+        self.buckets[popcount[old]].discard(index)
+        self.buckets[popcount[mask]].add(index)
+        cells[index] = mask
+
+    # restore every candidate mask changed since the trail had mark entries
+    def undo(self, cells, mark):
+        trail = self.trail
+        buckets = self.buckets
+        popcount = self.board.popcount
+        while len(trail) > mark:
+            index, mask = trail.pop()
+            buckets[popcount[cells[index]]].discard(index)
+            buckets[popcount[mask]].add(index)
+            cells[index] = mask
+
+    # remove candidates from a square, recording the old mask on the trail. this is how the rules change anything
+    # a square that is down to one candidate is queued for removal from its peers
+    # with backjump, reason is the levels of the guesses the values go because of, every guess so far by default
+    # return False if the square has nothing left
+    def eliminate(self, cells, index, values, reason=None):
+        mask = cells[index]
+        removed = mask & values
+        if not removed:
+            return True
+        popcount = self.board.popcount
+        self.trail.append((index, mask))
+        self.buckets[popcount[mask]].discard(index)
+        mask ^= removed
+        self.buckets[popcount[mask]].add(index)
+        cells[index] = mask
+        self.eliminated += popcount[removed]
+        if self.reasons is not None:
+            self.explain(index, removed, self.levels if reason is None else reason)
+        if not mask:
+            if self.reasons is not None:
+                self.conflict = self.because(index, 0)
+            return False
+        if popcount[mask] == 1:
+            self.pending.append(index)
+        return True
+
+    # with backjump, note that the values of removed went from a square because of the guesses of the levels of reason
+    def explain(self, index, removed, reason):
+        why = self.reasons[index]
+        while removed:
+            value = removed & -removed
+            why[value.bit_length() - 1] = reason
+            removed ^= value
+
+    # the levels of the guesses that took every value but the ones of mask away from a square
+    def because(self, index, mask):
+        why = self.reasons[index]
+        levels = 0
+        for k in range(self.board.size):
+            if not mask >> k & 1:
+                levels |= why[k]
+        return levels
+
+    # remove all the branches tha we don't need to try. every change is recorded on the trail
+    # settled values are removed from their peers first, then the rules run in order until none of them
+    # changes anything. whenever one does, it starts over from removing the newly settled values
+    # return an empty list if there's an unresolvable conflict
+    def prune_it(self, cells, index):
+        if index >= 0:
+            self.pending = [index]
+        else:
+            popcount = self.board.popcount
+            self.pending = [i for i, mask in enumerate(cells) if popcount[mask] == 1]
+        self.stats['propagations'] += 1
+        self.conflict = None
+        stats = self.rule_stats
+        remove_settled = self.remove_settled if self.reasons is None else self.remove_settled_explained
+        while True:
+            if not self.timed(stats['peers'], remove_settled, cells):
+                return []
+            for name, rule in self.rules:
+                before = self.eliminated
+                if not self.timed(stats[name], rule, self, cells):
+                    return []
+                if self.eliminated != before:
+                    break
+            else:
+                return cells
+
+    # every counter of STATS at zero
+    def new_stats(self):
+        return dict.fromkeys(STATS, 0)
+
+    def new_rule_stats(self):
+        return dict((name, {'calls': 0, 'eliminations': 0, 'seconds': 0.0})
+                    for name in ['peers'] + [name for name, _ in self.rules])
+
+    # run one rule and add its calls, eliminations and time to its entry of rule_stats
+    def timed(self, entry, rule, *args):
+        before = self.eliminated
+        start = default_timer()
+        result = rule(*args)
+        entry['seconds'] += default_timer() - start
+        entry['calls'] += 1
+        entry['eliminations'] += self.eliminated - before
+        return result
+
+    # remove the value of every pending settled square from its peers, which can settle more squares
+    # return False if a square runs out of candidates
+    def remove_settled(self, cells):
+        popcount = self.board.popcount
+        peer_index = self.peer_index
+        record = self.trail.append
+        buckets = self.buckets
+        spots = self.pending
+        eliminated = 0
+        # keep pruning till no spot changes
+        while spots:
+            settled = spots.pop()
+            settled_value = cells[settled]
+            for peer in peer_index[settled]:
+                mask = cells[peer]
+                if mask & settled_value:
+                    record((peer, mask))
+                    buckets[popcount[mask]].discard(peer)
+                    mask &= ~settled_value
+                    buckets[popcount[mask]].add(peer)
+                    cells[peer] = mask
+                    eliminated += 1
+                    # if after deleting the spot's value, one peer doesn't have an eligible value, prune
+                    if not mask:
+                        self.eliminated += eliminated
+                        return False
+                    if popcount[mask] == 1:
+                        spots.append(peer)
+        self.eliminated += eliminated
+        return True
+
+    # remove_settled for backjump: a value removed from a peer goes because of whatever settled the square,
+    # and a square left with nothing is a dead end because of whatever took all its values
+    def remove_settled_explained(self, cells):
+        popcount = self.board.popcount
+        peer_index = self.peer_index
+        record = self.trail.append
+        buckets = self.buckets
+        reasons = self.reasons
+        spots = self.pending
+        eliminated = 0
+        while spots:
+            settled = spots.pop()
+            settled_value = cells[settled]
+            k = settled_value.bit_length() - 1
+            cause = self.because(settled, settled_value)
+            for peer in peer_index[settled]:
+                mask = cells[peer]
+                if mask & settled_value:
+                    record((peer, mask))
+                    buckets[popcount[mask]].discard(peer)
+                    mask &= ~settled_value
+                    buckets[popcount[mask]].add(peer)
+                    cells[peer] = mask
+                    reasons[peer][k] = cause
+                    eliminated += 1
+                    if not mask:
+                        self.eliminated += eliminated
+                        self.conflict = self.because(peer, 0)
+                        return False
+                    if popcount[mask] == 1:
+                        spots.append(peer)
+        self.eliminated += eliminated
+        return True
+
+    def display(self, cells):
+        self.board.display(cells)
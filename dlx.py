@@ -0,0 +1,145 @@
+from __future__ import print_function
+
+# Knuth's Algorithm X on dancing links, as another backend for the same grids as Solver
+# the exact cover matrix has one column per constraint: each square holds a value, and each row, column and house
+# holds each value once. that is 4 * 81 = 324 columns for sudoku, 4 * 256 = 1024 for hexadoku,
+# 4 * size * size in general.
+# every candidate of every square is a matrix row covering four columns.
+# the links live in flat int lists, so covering and uncovering never allocate
+class DLXSolver:
+    def __init__(self, grid):
+        self.grid = grid
+        self.solution = None
+        self.stats = {}
+
+    def solve(self):
+        cells = self.grid.cells
+        self.build(cells, self.grid.board)
+        chosen = self.search()
+        if chosen is None:
+            self.solution = list(cells)
+            return False
+        solution = list(cells)
+        for node in chosen:
+            index, k = self.candidates[self.row_of[node]]
+            solution[index] = 1 << k
+        self.solution = solution
+        return True
+
+    # build the matrix. node 0 is the root, nodes 1 to columns are the column headers
+    def build(self, cells, board):
+        squares = board.squares
+        size = board.size
+        top = board.topology
+        columns = 4 * squares
+        self.left = L = list(range(-1, columns))
+        self.right = R = list(range(1, columns + 2))
+        L[0] = columns
+        R[columns] = 0
+        self.up = U = list(range(columns + 1))
+        self.down = D = list(range(columns + 1))
+        self.column = C = list(range(columns + 1))
+        self.count = S = [0] * (columns + 1)
+        self.row_of = row_of = [-1] * (columns + 1)
+        self.candidates = []
+        for index, mask in enumerate(cells):
+            row, col, house = top.square_units[index]
+            for k in range(size):
+                if not mask >> k & 1:
+                    continue
+                row_id = len(self.candidates)
+                self.candidates.append((index, k))
+                first = len(C)
+                # the square, and the value in its row, column and house. units are numbered rows, columns, houses
+                for header in (index + 1, squares + row * size + k + 1,
+                               squares + col * size + k + 1, squares + house * size + k + 1):
+                    node = len(C)
+                    C.append(header)
+                    row_of.append(row_id)
+                    # link below the last node of the column
+                    U.append(U[header])
+                    D.append(header)
+                    D[U[header]] = node
+                    U[header] = node
+                    S[header] += 1
+                    # link into the row
+                    L.append(node - 1 if node > first else node + 3)
+                    R.append(node + 1 if node < first + 3 else first)
+
+    def cover(self, c):
+        L, R, U, D, C, S = self.left, self.right, self.up, self.down, self.column, self.count
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, C, S = self.left, self.right, self.up, self.down, self.column, self.count
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    # depth first search over the matrix. returns the chosen row nodes of the first exact cover, or None
+    def search(self):
+        L, R, D, C, S = self.left, self.right, self.down, self.column, self.count
+        stats = self.stats = {'nodes': 0, 'backtracks': 0}
+        chosen = []
+        while True:
+            # every constraint is met
+            if R[0] == 0:
+                return chosen
+            # the column with the fewest rows left
+            c = R[0]
+            best = c
+            while c != 0:
+                if S[c] < S[best]:
+                    best = c
+                    if S[c] < 2:
+                        break
+                c = R[c]
+            if S[best]:
+                self.cover(best)
+                r = D[best]
+                chosen.append(r)
+                stats['nodes'] += 1
+                j = R[r]
+                while j != r:
+                    self.cover(C[j])
+                    j = R[j]
+                continue
+            # dead end. take back rows until one of them has another row left to try in its column
+            while chosen:
+                r = chosen.pop()
+                stats['backtracks'] += 1
+                j = L[r]
+                while j != r:
+                    self.uncover(C[j])
+                    j = L[j]
+                c = C[r]
+                r = D[r]
+                if r != c:
+                    chosen.append(r)
+                    stats['nodes'] += 1
+                    j = R[r]
+                    while j != r:
+                        self.cover(C[j])
+                        j = R[j]
+                    break
+                self.uncover(c)
+            else:
+                return None
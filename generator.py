@@ -0,0 +1,217 @@
+from __future__ import print_function
+import argparse, os, random, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core import Grid, Solver, board
+from puzzle_io import open_text
+from rules import RULES
+
+# squares that have to keep or lose their clues together, as a function of the square and the board size
+SYMMETRIES = {
+    'none': lambda row, col, size: [(row, col)],
+    # turned half way round
+    'rotational': lambda row, col, size: [(row, col), (size - 1 - row, size - 1 - col)],
+    # turned a quarter of the way round, four times
+    'quarter': lambda row, col, size: [(row, col), (col, size - 1 - row), (size - 1 - row, size - 1 - col),
+                                       (size - 1 - col, row)],
+    # mirrored left to right
+    'mirror': lambda row, col, size: [(row, col), (row, size - 1 - col)],
+    # mirrored along the main diagonal
+    'diagonal': lambda row, col, size: [(row, col), (col, row)],
+}
+
+# difficulty levels by the hardest thing the solve needed. only the removal of settled values from their peers
+# (naked singles) is easy, hidden singles are medium, pairs and pointing hard, triples and x-wings expert,
+# and anything that needs a guess is evil
+LEVELS = [
+    ('easy', ('peers',)),
+    ('medium', ('hidden_singles',)),
+    ('hard', ('naked_pairs', 'pointing')),
+    ('expert', ('naked_triples', 'x_wing')),
+]
+# points for every candidate each rule removes and for every guess, which order puzzles within a level
+WEIGHTS = {'peers': 0, 'hidden_singles': 1, 'naked_pairs': 3, 'pointing': 3, 'naked_triples': 6, 'x_wing': 8}
+GUESS_WEIGHT = 50
+# clues the command line leaves on a hexadoku unless told otherwise
+HEX_CLUES = 120
+
+
+# rate a problem by solving it with every rule. returns the level, a score and the search stats.
+# the guesses count towards the score, so the solver takes the lowest square among ties to keep the score of a
+# problem the same from run to run
+def rate(problem, solver=None):
+    if solver is None:
+        solver = Solver(Grid(problem), tie_break='first', rules=[name for name, _ in RULES])
+    else:
+        solver.grid.parse(problem)
+    if not solver.solve():
+        raise ValueError('problem has no solution')
+    stats = solver.rule_stats
+    score = solver.stats['guesses'] * GUESS_WEIGHT
+    level = LEVELS[0][0]
+    for name, entry in stats.items():
+        score += WEIGHTS[name] * entry['eliminations']
+    for name, names in LEVELS:
+        if any(stats.get(rule, {}).get('eliminations') for rule in names):
+            level = name
+    if solver.stats['guesses']:
+        level = 'evil'
+    return level, score, dict(solver.stats)
+
+
+# makes puzzles with a unique solution on one board. seed makes the puzzles reproducible.
+# one Grid and two Solvers are reused for every check: search for filling and for uniqueness,
+# and rater with every rule for the rating. both take the lowest square among ties, so that a seed gives the
+# same puzzles and ratings whatever order sets keep their squares in
+class Generator:
+    def __init__(self, board, seed=None, symmetry='none'):
+        if symmetry not in SYMMETRIES:
+            raise ValueError('unknown symmetry %r, pick from %s' % (symmetry, ', '.join(sorted(SYMMETRIES))))
+        self.board = board
+        self.rng = random.Random(seed)
+        self.symmetry = symmetry
+        self.grid = Grid('.' * board.squares, board)
+        self.search = Solver(self.grid, tie_break='first')
+        self.rater = Solver(Grid('.' * board.squares, board), tie_break='first', rules=[name for name, _ in RULES])
+        self.orbits = self.find_orbits()
+
+    # the groups of squares that keep or lose their clues together under the symmetry
+    def find_orbits(self):
+        size = self.board.size
+        pattern = SYMMETRIES[self.symmetry]
+        orbits = {}
+        for index in range(self.board.squares):
+            orbit = tuple(sorted(set(row * size + col for row, col in pattern(index // size, index % size, size))))
+            orbits[orbit[0]] = orbit
+        return list(orbits.values())
+
+    # a random full board: the houses along the diagonal share no row or column, so they are filled with
+    # shuffled values, and the search completes the rest. on small houses such as 2x2 the diagonal can come out
+    # with no way to complete it, and then a search in random order fills the board from nothing instead
+    def fill(self):
+        board = self.board
+        size = board.size
+        top = board.topology
+        cells = [board.all] * board.squares
+        for house in range(min(size // board.box_rows, size // board.box_cols)):
+            squares = top.unit_squares[2 * size + house * (size // board.box_cols) + house]
+            values = list(range(size))
+            self.rng.shuffle(values)
+            for index, k in zip(squares, values):
+                cells[index] = 1 << k
+        for solution in self.search.search(cells):
+            return list(solution)
+        shuffled = Solver(self.grid, tie_break='random', value_order='random', seed=self.rng.getrandbits(32))
+        for solution in shuffled.search([board.all] * board.squares):
+            return list(solution)
+        raise ValueError('no way to fill a %dx%d board' % (size, size))
+
+    # True if the clues pin the solution down. the clues were unique before the squares were taken out,
+    # so any other solution has to differ in one of them: look for one with each square barred from its value
+    def still_unique(self, clues, removed, solution):
+        for index in removed:
+            cells = list(clues)
+            cells[index] = self.board.all & ~solution[index]
+            if self.search.count_solutions(limit=1, cells=cells):
+                return False
+        return True
+
+    # one puzzle with a unique solution. clues is the number to stop at, or None to take out as many as can go.
+    # returns the problem string and its solution string
+    def generate(self, clues=None):
+        board = self.board
+        solution = self.fill()
+        cells = list(solution)
+        count = board.squares
+        orbits = list(self.orbits)
+        self.rng.shuffle(orbits)
+        for orbit in orbits:
+            if clues is not None and count - len(orbit) < clues:
+                continue
+            for index in orbit:
+                cells[index] = board.all
+            if self.still_unique(cells, orbit, solution):
+                count -= len(orbit)
+                if count == clues:
+                    break
+            else:
+                for index in orbit:
+                    cells[index] = solution[index]
+        return board.to_string(cells), board.to_string(solution)
+
+    # a generated puzzle with its rating, as (problem, solution, level, score)
+    def rated(self, clues=None):
+        problem, solution = self.generate(clues)
+        level, score, _ = rate(problem, self.rater)
+        return problem, solution, level, score
+
+
+# generate count rated puzzles in a worker. every puzzle has its own seed, so the results don't depend on
+# how the work is split between the workers
+def generate_chunk(shape, seeds, clues, symmetry):
+    generator = Generator(board(*shape), None, symmetry)
+    results = []
+    for seed in seeds:
+        generator.rng.seed(seed)
+        results.append(generator.rated(clues))
+    return results
+
+
+# yield count rated puzzles, (problem, solution, level, score), on a pool of worker processes.
+# seed numbers them seed, seed + 1 and so on. workers=0 generates them in this process
+def generate_many(count, shape=(3, 3), seed=0, clues=None, symmetry='none', workers=None, chunksize=8):
+    seeds = range(seed, seed + count)
+    if workers == 0:
+        generator = Generator(board(*shape), None, symmetry)
+        for s in seeds:
+            generator.rng.seed(s)
+            yield generator.rated(clues)
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, count, chunksize):
+            pending.append(executor.submit(generate_chunk, shape, seeds[start:start + chunksize], clues, symmetry))
+            if len(pending) >= workers * 4:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate sudoku and hexadoku problems with a unique solution.')
+    parser.add_argument('-n', '--count', type=int, default=10, help='number of problems')
+    parser.add_argument('-s', '--size', type=int, choices=[9, 16], default=9, help='9 for sudoku, 16 for hexadoku')
+    parser.add_argument('-c', '--clues', type=int,
+                        help='stop taking clues out at this many, 0 for as few as can be (default: 0 for sudoku, '
+                             '%d for hexadoku, where going all the way down takes seconds a puzzle)' % HEX_CLUES)
+    parser.add_argument('-y', '--symmetry', choices=sorted(SYMMETRIES), default='none')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first problem, the next ones count up')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, 0 to generate in this process (default: one per core)')
+    parser.add_argument('-o', '--output', default='-', help='file for the problems, .gz to compress (default: stdout)')
+    args = parser.parse_args(argv)
+
+    shape = (3, 3) if args.size == 9 else (4, 4)
+    clues = args.clues
+    if clues is None:
+        clues = 0 if args.size == 9 else HEX_CLUES
+    start = time.time()
+    out, close = open_text(args.output, 'w')
+    try:
+        for problem, _, level, score in generate_many(args.count, shape, args.seed, clues, args.symmetry,
+                                                      args.workers):
+            # the rating goes in a comment, which puzzle_io.read_puzzles skips
+            out.write('%s # %s %d\n' % (problem, level, score))
+    finally:
+        if close:
+            out.close()
+    print('generated %d problems in %.3fs' % (args.count, time.time() - start), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+from __future__ import print_function
+import argparse, json, sys
+
+from core import Grid, Solver
+from puzzle_io import open_text, read_puzzles
+from rules import RULES, DEFAULT_RULES
+
+
+# hooks for Solver that write the search as JSON lines, one event per line:
+# guess and contradiction events as they happen, then a solution event and the stats of the search.
+# every keeps one guess or contradiction in every so many, so a search of millions of nodes stays readable.
+# solution and stats events are always written
+class Trace:
+    def __init__(self, dest='-', every=1):
+        self.file, self.should_close = open_text(dest, 'w')
+        self.every = max(1, every)
+        self.events = 0         # guesses and contradictions seen, written or not
+        self.written = 0
+
+    def write(self, event):
+        self.file.write(json.dumps(event, sort_keys=True) + '\n')
+        self.written += 1
+
+    # count an event, and write it if it's one of the sampled ones
+    def sample(self, event):
+        self.events += 1
+        if self.events % self.every == 0:
+            self.write(event)
+
+    # the problem the following events belong to
+    def start(self, problem, number=None):
+        self.events = 0
+        self.write({'event': 'problem', 'number': number, 'problem': problem})
+
+    def on_guess(self, solver, index, value, depth):
+        stats = solver.stats
+        self.sample({'event': 'guess', 'node': stats['nodes'], 'depth': depth, 'square': index,
+                     'value': solver.board.symbols[value.bit_length() - 1],
+                     'trail': len(solver.trail)})
+
+    def on_contradiction(self, solver, index, depth):
+        self.sample({'event': 'contradiction', 'node': solver.stats['nodes'], 'depth': depth, 'square': index,
+                     'trail': len(solver.trail)})
+
+    def on_solution(self, solver, cells):
+        self.write({'event': 'solution', 'node': solver.stats['nodes'],
+                    'solution': solver.board.to_string(cells)})
+
+    # the counters of the search and the work of every rule, once it is over
+    def finish(self, solver, solved):
+        self.write({'event': 'stats', 'solved': solved, 'stats': solver.stats, 'rules': solver.rule_stats})
+
+    def close(self):
+        if self.should_close:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve puzzles and trace the search as JSON lines.')
+    parser.add_argument('files', nargs='*', default=['-'], help="puzzle files, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help='trace file, .gz to compress')
+    parser.add_argument('-e', '--every', type=int, default=1, help='write one guess or contradiction in every N')
+    parser.add_argument('-r', '--rules', nargs='*', choices=[name for name, _ in RULES], default=list(DEFAULT_RULES))
+    args = parser.parse_args(argv)
+
+    with Trace(args.output, args.every) as trace:
+        number = 0
+        for path in args.files:
+            for problem in read_puzzles(path):
+                trace.start(problem, number)
+                solver = Solver(Grid(problem), rules=args.rules, hooks=trace)
+                trace.finish(solver, solver.solve())
+                number += 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+from __future__ import print_function
+import argparse, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from core import Grid, Solver, board_for
+from puzzle_io import read_puzzles
+
+# nodes a worker searches of one part before it hands back what it didn't get to
+TASK_NODES = 2000
+# parts split off the top of the tree per worker before the search starts
+PARTS_PER_WORKER = 4
+
+_solvers = {}
+
+
+# the solver of a board size, made once per worker process
+def solver_for(squares):
+    if squares not in _solvers:
+        _solvers[squares] = Solver(Grid('.' * squares, board_for(squares)))
+    return _solvers[squares]
+
+
+# search one part in a worker. limit stops it after that many solutions.
+# returns the first solution string or None, the number of solutions, the parts left over and the nodes searched
+def search_part(cells, limit=None, max_nodes=TASK_NODES):
+    solver = solver_for(len(cells))
+    solver.max_nodes = max_nodes
+    first = None
+    count = 0
+    for solution in solver.search(list(cells)):
+        if first is None:
+            first = solver.board.to_string(solution)
+        count += 1
+        if count == limit:
+            break
+    parts = solver.frontier if solver.status == 'node_limit' else []
+    return first, count, parts, solver.stats['nodes']
+
+
+# the nodes of the top of the tree, expanded breadth first until there are wanted of them or none left to expand.
+# the nodes without candidates left are dropped, and the ones that are solutions stay in for a worker to report
+def split(cells, solver, wanted):
+    solver.reset(cells)
+    if not solver.prune_it(cells, -1):
+        return []
+    parts = deque([cells])
+    settled = []
+    while parts and len(parts) + len(settled) < wanted:
+        cells = parts.popleft()
+        solver.reset(cells)
+        index = solver.select_square(cells)
+        if index < 0:
+            settled.append(cells)
+            continue
+        mask = cells[index]
+        while mask:
+            value = mask & -mask
+            mask ^= value
+            child = list(cells)
+            solver.reset(child)
+            solver.set_mask(child, index, value)
+            if solver.prune_it(child, index):
+                parts.append(child)
+    return settled + list(parts)
+
+
+# one puzzle searched by a pool of processes. the top levels of the search tree are split into parts, each
+# the candidate masks of one node, and every worker searches a part for at most task_nodes nodes. a worker that
+# runs out hands back the node it stopped at and the other branch of every guess on its domain_stack, so the
+# parts are split further wherever the tree turns out to be big, and idle workers pick them up
+class ParallelSearch:
+    def __init__(self, workers=None, task_nodes=TASK_NODES):
+        self.workers = workers or os.cpu_count()
+        self.task_nodes = task_nodes
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.stats = {'parts': 0, 'nodes': 0}      # counters of the last search
+
+    # search the problem until limit solutions are found, or all of them with no limit.
+    # returns the first solution found and the number of solutions. as soon as the limit is reached the parts
+    # still waiting are cancelled, and the ones being searched stop at their node budget with nobody to answer
+    def search(self, problem, limit=None):
+        grid = Grid(problem)
+        parts = deque(split(list(grid.cells), Solver(grid), self.workers * PARTS_PER_WORKER))
+        stats = self.stats = {'parts': 0, 'nodes': 0}
+        first = None
+        count = 0
+        pending = set()
+        try:
+            while parts or pending:
+                # keep every worker busy with one part waiting each. parts are taken last in first out, so the node
+                # a worker stopped at is picked up again first and the search stays depth first
+                wanted = None if limit is None else limit - count
+                while parts and len(pending) < self.workers * 2:
+                    pending.add(self.executor.submit(search_part, parts.pop(), wanted, self.task_nodes))
+                    stats['parts'] += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    solution, found, left, nodes = future.result()
+                    stats['nodes'] += nodes
+                    if first is None:
+                        first = solution
+                    count += found
+                    parts.extend(reversed(left))
+                if limit is not None and count >= limit:
+                    return first, limit
+            return first, count
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # a solution of the problem as a string, or None
+    def solve(self, problem):
+        return self.search(problem, 1)[0]
+
+    # the number of solutions, counting no further than limit when there is one.
+    # count_solutions(problem, 2) == 1 tells a puzzle with a unique solution
+    def count_solutions(self, problem, limit=None):
+        return self.search(problem, limit)[1]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# solve one problem on a pool of workers started for it
+def solve_parallel(problem, workers=None, task_nodes=TASK_NODES):
+    with ParallelSearch(workers, task_nodes) as search:
+        return search.solve(problem)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search one problem at a time on all the cores.')
+    parser.add_argument('files', nargs='*', default=['-'], help="problem files, '-' for stdin")
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('-n', '--task-nodes', type=int, default=TASK_NODES,
+                        help='nodes a worker searches before handing back the rest of its part')
+    parser.add_argument('-c', '--count', action='store_true',
+                        help='count the solutions instead, up to --limit, and print the count after each solution')
+    parser.add_argument('-l', '--limit', type=int, default=2,
+                        help='with --count, stop counting at this many, 0 for no limit (default: 2, which tells '
+                             'a unique solution)')
+    args = parser.parse_args(argv)
+
+    with ParallelSearch(args.workers, args.task_nodes) as search:
+        for path in args.files:
+            for problem in read_puzzles(path):
+                start = time.time()
+                solution, count = search.search(problem, (args.limit or None) if args.count else 1)
+                line = solution or '==No solution=='
+                if args.count:
+                    line += ' %d' % count
+                print(line)
+                print('%d parts, %d nodes, %.3fs' % (search.stats['parts'], search.stats['nodes'],
+                                                     time.time() - start), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+from __future__ import print_function
+import gzip, json, os, re, sys
+
+from core import board_for
+
+# a problem written as a quoted string, like the lists in easy_sudoku_problems.txt
+QUOTED = re.compile(r'''['"]([.0-9A-Za-z]+)['"]''')
+# a bare problem on a line of its own
+PROBLEM = re.compile(r'^[.0-9A-Za-z]+$')
+# the ways ResultWriter can write results, see render
+FORMATS = ('line', 'pretty', 'jsonl', 'binary')
+# bytes of rendered results a writer gathers before writing them out in one go
+BUFFER = 1 << 16
+
+
+# open a path for reading or writing text, or bytes with mode 'rb' or 'wb'. '-' is stdin or stdout and names
+# ending in .gz are gzipped. returns the file and whether the caller is responsible for closing it
+def open_text(path, mode='r'):
+    if path == '-':
+        f = sys.stdin if mode.startswith('r') else sys.stdout
+        return (f.buffer if 'b' in mode else f), False
+    if path.endswith('.gz'):
+        return gzip.open(path, mode if 'b' in mode else mode + 't'), True
+    return open(path, mode), True
+
+
+# yield the problems of a file one at a time, so a corpus never has to fit in memory
+# a line holds one 81 or 256 character problem, anything after a '#' is a comment and blank lines are skipped.
+# lines with quoted problems, like the python lists of the bundled benchmark files, yield every quoted problem
+# source is a path, '-' for stdin, or an open file
+def read_puzzles(source='-'):
+    if hasattr(source, 'read'):
+        f, close = source, False
+    else:
+        f, close = open_text(source)
+    try:
+        for number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0]
+            quoted = QUOTED.findall(line)
+            if quoted:
+                for problem in quoted:
+                    yield problem
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            if not PROBLEM.match(line):
+                raise ValueError('%s:%d: not a problem: %r' % (getattr(f, 'name', source), number, line[:40]))
+            yield line
+    finally:
+        if close:
+            f.close()
+
+
+# the bundled problem sets and the files next to this module they are read from
+CORPORA = {'easy': 'easy_sudoku_problems.txt', 'hard': 'hard_sudoku_problems.txt', 'hard16': 'hexadoku_problems.txt'}
+_corpora = {}
+
+
+# the problems of a bundled set, read from its file the first time it is asked for
+def corpus(name):
+    if name not in CORPORA:
+        raise ValueError('unknown corpus %r, pick from %s' % (name, ', '.join(sorted(CORPORA))))
+    if name not in _corpora:
+        _corpora[name] = list(read_puzzles(os.path.join(os.path.dirname(os.path.abspath(__file__)), CORPORA[name])))
+    return _corpora[name]
+
+
+# one result in one of the FORMATS, as a single string, or bytes for binary:
+# line is the solution on a line of its own, after its input position with with_index, or '==No solution=='.
+# pretty is the solution as a grid with the houses set apart, after the problem when there is one.
+# jsonl is a JSON object of the input position, problem, solution and search stats on a line.
+# binary is the solution packed by Board.pack, every record of a board the same length and all zeros without
+# a solution
+def render(format, index, solution, problem=None, stats=None, with_index=False):
+    if format == 'line':
+        line = solution or '==No solution=='
+        return '%d %s\n' % (index, line) if with_index else line + '\n'
+    if format == 'pretty':
+        text = ''
+        if problem is not None:
+            board = board_for(len(problem))
+            text = '====Problem====\n' + board.pretty(board.parse(problem)) + '====Solution===\n'
+        if solution is None:
+            return text + '==No solution==\n'
+        board = board_for(len(solution))
+        return text + board.pretty(board.parse(solution))
+    if format == 'jsonl':
+        return json.dumps({'index': index, 'problem': problem, 'solution': solution, 'stats': stats},
+                          sort_keys=True) + '\n'
+    if format == 'binary':
+        if solution is None:
+            if problem is None:
+                raise ValueError('a binary result without a solution needs its problem for its length')
+            return bytes(board_for(len(problem)).packed_size)
+        board = board_for(len(solution))
+        return board.pack(board.parse(solution))
+    raise ValueError('unknown format %r, pick from %s' % (format, ', '.join(FORMATS)))
+
+
+# write results in one of the FORMATS. they are rendered one string each and gathered until there are buffer
+# bytes of them, then written in one go, so a big batch costs a write per buffer rather than per result.
+# buffer=0 writes every result as it comes. a binary result without a solution or problem is as long as the record
+# before it, or a sudoku record to begin with
+class ResultWriter:
+    def __init__(self, dest='-', format='line', with_index=False, buffer=BUFFER):
+        if format not in FORMATS:
+            raise ValueError('unknown format %r, pick from %s' % (format, ', '.join(FORMATS)))
+        if hasattr(dest, 'write'):
+            self.file, self.close_file = dest, False
+        else:
+            self.file, self.close_file = open_text(dest, 'wb' if format == 'binary' else 'w')
+        self.format = format
+        self.with_index = with_index
+        self.buffer = buffer
+        self.chunks = []
+        self.size = 0       # length of the chunks waiting to be written
+        self.written = 0
+        self.squares = 81   # squares of the last solution
+
+    def write(self, index, solution, problem=None, stats=None):
+        if solution is not None:
+            self.squares = len(solution)
+        elif problem is None and self.format == 'binary':
+            problem = '.' * self.squares
+        chunk = render(self.format, index, solution, problem, stats, self.with_index)
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        self.written += 1
+        if self.size >= self.buffer:
+            self.flush()
+
+    # write every (input position, solution) pair of an iterable, such as the results of batch.solve_many
+    def write_all(self, results):
+        for index, solution in results:
+            self.write(index, solution)
+
+    def flush(self):
+        if self.chunks:
+            self.file.write((b'' if self.format == 'binary' else '').join(self.chunks))
+            self.chunks = []
+            self.size = 0
+
+    def close(self):
+        self.flush()
+        if self.close_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# write solutions as lines, a solution of None as '==No solution=='. with_index puts the input position in front
+# of each line
+class SolutionWriter(ResultWriter):
+    def __init__(self, dest='-', with_index=False, buffer=BUFFER):
+        ResultWriter.__init__(self, dest, 'line', with_index, buffer)
@@ -0,0 +1,160 @@
+from __future__ import print_function
+from itertools import combinations
+
+# propagation rules that Solver.prune_it runs once removing settled values from their peers has nothing left to do.
+# every rule takes the solver and its candidate masks, removes candidates only through solver.eliminate so the
+# changes go on the trail, and returns False as soon as it finds a conflict.
+# prune_it goes back to the cheapest rule whenever one of them removes something
+
+
+# a value that only one square of a unit can still take goes in that square.
+# each unit is swept once, keeping the values seen at least once and at least twice as two masks,
+# which is a count table of every value saturated at two. units limits the sweep to some of the units
+def hidden_singles(solver, cells, units=None):
+    full = solver.board.all
+    reasons = solver.reasons
+    for unit in solver.topology.unit_squares if units is None else units:
+        once = twice = 0
+        for index in unit:
+            mask = cells[index]
+            twice |= once & mask
+            once |= mask
+        # a value that no square of the unit can take
+        if once != full:
+            if reasons is not None:
+                missing = full & ~once
+                solver.conflict = why_not(reasons, unit, missing & -missing)
+            return False
+        singles = once & ~twice
+        if not singles:
+            continue
+        for index in unit:
+            mask = cells[index]
+            single = mask & singles
+            if single and mask != single:
+                # two values that only this square can take
+                if single & (single - 1):
+                    return False
+                if reasons is None:
+                    solver.eliminate(cells, index, mask & ~single)
+                else:
+                    # the square gets the value because the rest of the unit lost it
+                    solver.eliminate(cells, index, mask & ~single, why_not(reasons, unit, single, index))
+    return True
+
+
+# for backjump, the levels of the guesses that took the values away from the squares, all of them but skip
+def why_not(reasons, squares, values, skip=-1):
+    levels = 0
+    while values:
+        value = values & -values
+        values ^= value
+        k = value.bit_length() - 1
+        for index in squares:
+            if index != skip:
+                levels |= reasons[index][k]
+    return levels
+
+
+# k squares of a unit whose candidates together are just k values keep those values to themselves,
+# so the rest of the unit can't have them
+def naked_subsets(solver, cells, k):
+    popcount = solver.board.popcount
+    for unit in solver.topology.unit_squares:
+        open_squares = [index for index in unit if 1 < popcount[cells[index]] <= k]
+        if len(open_squares) < k:
+            continue
+        for subset in combinations(open_squares, k):
+            union = 0
+            for index in subset:
+                union |= cells[index]
+            count = popcount[union]
+            if count < k:
+                return False
+            if count > k:
+                continue
+            for index in unit:
+                if index not in subset and cells[index] & union:
+                    if not solver.eliminate(cells, index, union):
+                        return False
+    return True
+
+
+def naked_pairs(solver, cells):
+    return naked_subsets(solver, cells, 2)
+
+
+def naked_triples(solver, cells):
+    return naked_subsets(solver, cells, 3)
+
+
+# where a row or column crosses a house: a value the rest of the house can't take has to be in the crossing,
+# so the rest of the line loses it (pointing pairs), and a value the rest of the line can't take has to be in
+# the crossing, so the rest of the house loses it (box-line reduction)
+def pointing(solver, cells):
+    for common, house_rest, line_rest in solver.topology.crossings:
+        inside = house = line = 0
+        for index in common:
+            inside |= cells[index]
+        for index in house_rest:
+            house |= cells[index]
+        for index in line_rest:
+            line |= cells[index]
+        only_here = inside & ~house & line
+        if only_here:
+            # the line loses the values because the rest of the house lost them
+            reason = None if solver.reasons is None else why_not(solver.reasons, house_rest, only_here)
+            for index in line_rest:
+                if not solver.eliminate(cells, index, only_here, reason):
+                    return False
+        only_here = inside & ~line & house
+        if only_here:
+            reason = None if solver.reasons is None else why_not(solver.reasons, line_rest, only_here)
+            for index in house_rest:
+                if not solver.eliminate(cells, index, only_here, reason):
+                    return False
+    return True
+
+
+# two rows with a value in the same two columns and nowhere else take it in those columns,
+# so every other row loses it there. the same goes with rows and columns swapped
+def x_wing(solver, cells):
+    size = solver.board.size
+    popcount = solver.board.popcount
+    units = solver.topology.unit_squares
+    rows = units[:size]
+    cols = units[size:2 * size]
+    for lines, crosses in ((rows, cols), (cols, rows)):
+        for k in range(size):
+            bit = 1 << k
+            seen = {}
+            for number, line in enumerate(lines):
+                # where the value can go along the line, bit p for position p
+                places = 0
+                for position, index in enumerate(line):
+                    if cells[index] & bit:
+                        places |= 1 << position
+                if popcount[places] != 2:
+                    continue
+                if places not in seen:
+                    seen[places] = number
+                    continue
+                pair = (seen[places], number)
+                for position in range(size):
+                    if places >> position & 1:
+                        for other, index in enumerate(crosses[position]):
+                            if other not in pair and not solver.eliminate(cells, index, bit):
+                                return False
+    return True
+
+
+# the rules by name, cheapest first, which is the order prune_it tries them in
+RULES = [
+    ('hidden_singles', hidden_singles),
+    ('naked_pairs', naked_pairs),
+    ('pointing', pointing),
+    ('naked_triples', naked_triples),
+    ('x_wing', x_wing),
+]
+# hidden singles are what Rule No.2 used to do. pointing halves the search nodes on the hard set for little cost
+DEFAULT_RULES = ('hidden_singles', 'pointing')
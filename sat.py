@@ -0,0 +1,393 @@
+from __future__ import print_function
+import argparse, heapq, itertools, os, shutil, subprocess, sys
+
+from core import board_for, luby
+
+# the variable of "square index holds candidate k" is index * size + k + 1, which for sudoku is the usual
+# row * 81 + col * 9 + digit numbering of the notes (rows and columns from 0, digits from 1)
+
+
+# encode the candidates of a grid as a CNF formula
+# returns the number of variables and the clauses as lists of non-zero ints
+# compact first removes every given from its peers and only emits clauses over the candidates that are left,
+# otherwise every candidate gets a variable and the givens become unit clauses.
+# extended adds the redundant "at most one value per square" and "every value somewhere in a unit" clauses,
+# which cost more clauses but let unit propagation do much more of the work
+# the board is worked out from the number of squares unless it is given
+def encode(cells, compact=True, extended=True, board=None):
+    board = board or board_for(len(cells))
+    squares = board.squares
+    size = board.size
+    top = board.topology
+    given = [mask & (mask - 1) == 0 for mask in cells]
+    cells = list(cells)
+    clauses = []
+    if compact:
+        for index, mask in enumerate(cells):
+            if given[index]:
+                for peer in top.peers[index]:
+                    cells[peer] &= ~mask
+        # two givens that clash, or a square the givens leave without candidates. the givens get no clauses of
+        # their own, so nothing else would say the formula can't be satisfied
+        if not all(cells):
+            clauses.append([])
+    else:
+        cells = [mask if mask & (mask - 1) == 0 else (1 << size) - 1 for mask in cells]
+
+    def var(index, k):
+        return index * size + k + 1
+
+    # every square holds at least one of its candidates
+    for index, mask in enumerate(cells):
+        candidates = [var(index, k) for k in range(size) if mask >> k & 1]
+        if compact and given[index]:
+            continue
+        clauses.append(candidates)
+        if extended:
+            for i in range(len(candidates)):
+                for j in range(i + 1, len(candidates)):
+                    clauses.append([-candidates[i], -candidates[j]])
+    # every value appears at most once in a unit, and with extended at least once
+    for unit in top.unit_squares:
+        for k in range(size):
+            bit = 1 << k
+            holders = [var(index, k) for index in unit if cells[index] & bit]
+            if compact and any(given[index] and cells[index] == bit for index in unit):
+                # placed by a given, which already cleared it from the rest of the unit
+                continue
+            for i in range(len(holders)):
+                for j in range(i + 1, len(holders)):
+                    clauses.append([-holders[i], -holders[j]])
+            if extended:
+                clauses.append(holders)
+    return squares * size, clauses
+
+
+# turn a model, the set of true variables, back into a list of candidate masks.
+# a given keeps its value when the model leaves it out, as the compact encoding does. returns None if the model
+# leaves any other square without a true variable, which is no solution
+def decode(cells, model):
+    size = int(round(len(cells) ** 0.5))
+    solution = []
+    for index, mask in enumerate(cells):
+        for k in range(size):
+            if mask >> k & 1 and index * size + k + 1 in model:
+                solution.append(1 << k)
+                break
+        else:
+            if mask & (mask - 1):
+                return None
+            solution.append(mask)
+    return solution
+
+
+# the formula in DIMACS format
+def dimacs(num_vars, clauses, comment=None):
+    lines = []
+    if comment:
+        lines.append('c ' + comment)
+    lines.append('p cnf %d %d' % (num_vars, len(clauses)))
+    for clause in clauses:
+        lines.append(' '.join(map(str, clause)) + ' 0')
+    return '\n'.join(lines) + '\n'
+
+
+def write_dimacs(path, num_vars, clauses, comment=None):
+    with open(path, 'w') as f:
+        f.write(dimacs(num_vars, clauses, comment))
+
+
+# the picosat binary on PATH, or the ../picosat the assignment asks for, or None
+def find_picosat():
+    found = shutil.which('picosat')
+    if found:
+        return found
+    parent = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'picosat')
+    if os.path.isfile(parent) and os.access(parent, os.X_OK):
+        return parent
+    return None
+
+
+# solve with the picosat binary, handing it the formula on stdin. returns the set of true variables or None
+def picosat(num_vars, clauses, binary=None):
+    result = subprocess.run([binary or find_picosat()], input=dimacs(num_vars, clauses),
+                            stdout=subprocess.PIPE, universal_newlines=True)
+    model = set()
+    satisfiable = False
+    for line in result.stdout.splitlines():
+        if line.startswith('s '):
+            satisfiable = line.split()[1] == 'SATISFIABLE'
+        elif line.startswith('v '):
+            model.update(lit for lit in map(int, line.split()[1:]) if lit > 0)
+    return model if satisfiable else None
+
+
+############################################################
+
+
+# a small conflict-driven clause learning solver, so the SAT backend works without any binary
+# two watched literals, first-UIP learning, VSIDS branching with phase saving and Luby restarts
+class CDCL:
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.values = [0] * (num_vars + 1)      # 1 true, -1 false, 0 unassigned
+        self.levels = [0] * (num_vars + 1)
+        self.reasons = [None] * (num_vars + 1)  # the clause that implied a variable, its literal comes first
+        self.phases = [True] * (num_vars + 1)   # the value a variable had last time, tried first
+        self.activity = [0.0] * (num_vars + 1)
+        self.increment = 1.0
+        self.watches = [[] for _ in range(2 * num_vars + 1)]  # literal + num_vars -> clauses watching it
+        self.trail = []
+        self.trail_lim = []     # trail length at the start of each decision level
+        self.head = 0           # next trail entry to propagate
+        self.heap = []
+        self.conflicts = 0
+        self.decisions = 0
+        self.ok = True
+        used = set()
+        for clause in clauses:
+            clause = list(set(clause))
+            used.update(abs(lit) for lit in clause)
+            if not clause:
+                self.ok = False
+            elif len(clause) == 1:
+                if not self.enqueue(clause[0], None):
+                    self.ok = False
+            else:
+                self.watch(clause)
+        self.heap = [(0.0, v) for v in sorted(used)]
+
+    def value(self, lit):
+        value = self.values[abs(lit)]
+        return value if lit > 0 else -value
+
+    def watch(self, clause):
+        self.watches[clause[0] + self.num_vars].append(clause)
+        self.watches[clause[1] + self.num_vars].append(clause)
+
+    # make a literal true. returns False if it is already false
+    def enqueue(self, lit, reason):
+        value = self.value(lit)
+        if value:
+            return value > 0
+        v = abs(lit)
+        self.values[v] = 1 if lit > 0 else -1
+        self.levels[v] = len(self.trail_lim)
+        self.reasons[v] = reason
+        self.trail.append(lit)
+        return True
+
+    # unit propagation over the watched literals. returns a conflicting clause or None
+    def propagate(self):
+        values = self.values
+        watches = self.watches
+        n = self.num_vars
+        trail = self.trail
+        while self.head < len(trail):
+            false_lit = -trail[self.head]
+            self.head += 1
+            watching = watches[false_lit + n]
+            watches[false_lit + n] = kept = []
+            for position, clause in enumerate(watching):
+                # keep the false literal in the second slot
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value > 0:
+                    kept.append(clause)
+                    continue
+                # look for another literal that isn't false to watch instead
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (values[abs(lit)] if lit > 0 else -values[abs(lit)]) >= 0:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[lit + n].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value < 0:
+                        kept.extend(watching[position + 1:])
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    # first-UIP conflict analysis. returns the learnt clause, asserting literal first, and the level to go back to
+    def analyze(self, conflict):
+        seen = set()
+        learnt = [None]
+        level = len(self.trail_lim)
+        pending = 0
+        lit = None
+        position = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == lit or v in seen or self.levels[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.levels[v] == level:
+                    pending += 1
+                else:
+                    learnt.append(q)
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            lit = self.trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.reasons[abs(lit)]
+        learnt[0] = -lit
+        back = 0
+        if len(learnt) > 1:
+            # watch the literal of the highest remaining level second, so the clause is unit after going back
+            best = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            back = self.levels[abs(learnt[1])]
+        return learnt, back
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.num_vars + 1) if not self.values[u]]
+            heapq.heapify(self.heap)
+        elif not self.values[v]:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.values[v] = 0
+            self.reasons[v] = None
+            self.phases[v] = lit > 0
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+        # drop the stale heap entries once they outnumber the variables
+        if len(self.heap) > 4 * self.num_vars:
+            self.heap = [(-self.activity[v], v) for v in set(v for _, v in self.heap) if not self.values[v]]
+            heapq.heapify(self.heap)
+
+    # the unassigned variable with the highest activity, or 0 when everything is assigned
+    def pick(self):
+        heap = self.heap
+        while heap:
+            v = heapq.heappop(heap)[1]
+            if not self.values[v]:
+                return v
+        return 0
+
+    # returns the set of true variables, or None if the formula is unsatisfiable
+    def solve(self):
+        if not self.ok:
+            return None
+        restart = 1
+        budget = 100 * luby(restart)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    return None
+                learnt, back = self.analyze(conflict)
+                self.cancel_until(back)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.increment /= 0.95
+                budget -= 1
+                if budget <= 0:
+                    restart += 1
+                    budget = 100 * luby(restart)
+                    self.cancel_until(0)
+            else:
+                v = self.pick()
+                if not v:
+                    return set(v for v in range(1, self.num_vars + 1) if self.values[v] > 0)
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(v if self.phases[v] else -v, None)
+
+
+############################################################
+
+
+# the SAT backend with the same surface as the search Solver: solve() returns True or False and leaves the
+# candidate masks of the answer in solution. backend is 'picosat', 'cdcl', or 'auto' for picosat when it is found
+class SatSolver:
+    def __init__(self, grid, backend='auto', compact=True, extended=True):
+        self.grid = grid
+        self.solution = None
+        if backend == 'auto':
+            backend = 'picosat' if find_picosat() else 'cdcl'
+        self.backend = backend
+        self.compact = compact
+        self.extended = extended
+        self.stats = {}
+
+    def solve(self):
+        cells = self.grid.cells
+        num_vars, clauses = self.encode()
+        if self.backend == 'picosat':
+            model = picosat(num_vars, clauses)
+            self.stats = {'clauses': len(clauses)}
+        else:
+            engine = CDCL(num_vars, clauses)
+            model = engine.solve()
+            self.stats = {'clauses': len(clauses), 'conflicts': engine.conflicts, 'decisions': engine.decisions}
+        solution = decode(cells, model) if model is not None else None
+        if solution is None:
+            self.solution = list(cells)
+            return False
+        self.solution = solution
+        return True
+
+    def encode(self):
+        return encode(self.grid.cells, self.compact, self.extended, self.grid.board)
+
+    # write the formula of the grid as a DIMACS file
+    def write(self, path):
+        num_vars, clauses = self.encode()
+        write_dimacs(path, num_vars, clauses)
+
+
+def main(argv=None):
+    from core import Grid
+    from puzzle_io import read_puzzles, SolutionWriter
+    parser = argparse.ArgumentParser(description='Solve sudoku problems of any size through a SAT encoding.')
+    parser.add_argument('files', nargs='*', default=['-'], help='problem files, - or nothing reads stdin')
+    parser.add_argument('-b', '--backend', choices=['auto', 'picosat', 'cdcl'], default='auto')
+    parser.add_argument('--cnf', metavar='DIR', help='also write problem N of the input to DIR/N.cnf')
+    parser.add_argument('--full', action='store_true', help='encode every candidate instead of the compact form')
+    parser.add_argument('--minimal', action='store_true', help='leave out the redundant extended clauses')
+    args = parser.parse_args(argv)
+
+    unsolved = 0
+    problems = itertools.chain.from_iterable(read_puzzles(path) for path in args.files)
+    with SolutionWriter('-') as writer:
+        for index, problem in enumerate(problems, 1):
+            grid = Grid(problem)
+            solver = SatSolver(grid, args.backend, not args.full, not args.minimal)
+            if args.cnf:
+                solver.write(os.path.join(args.cnf, '%d.cnf' % index))
+            if solver.solve():
+                writer.write(index, grid.board.to_string(solver.solution))
+            else:
+                unsolved += 1
+                writer.write(index, None)
+    return 1 if unsolved else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
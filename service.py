@@ -0,0 +1,168 @@
+from __future__ import print_function
+import argparse, asyncio, multiprocessing, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core import Grid, Solver
+
+# seconds a search may take unless the request says otherwise
+TIMEOUT = 10.0
+# how long past its deadline a worker gets to notice and stop before the request is answered without it
+GRACE = 1.0
+
+
+# solve one problem in a worker process and return (status, solution string or None, seconds, nodes).
+# deadline is a time.time(), so the time spent waiting for a free worker counts against it
+def solve_in_worker(problem, deadline):
+    start = time.time()
+    try:
+        grid = Grid(problem)
+    except ValueError as e:
+        return 'error', str(e), 0.0, 0
+    solver = Solver(grid, deadline=deadline)
+    solution = grid.board.to_string(solver.solution) if solver.solve() else None
+    return solver.status, solution, time.time() - start, solver.stats['nodes']
+
+
+# solves problems for asyncio code without blocking the event loop. searches run on a pool of worker processes,
+# at most concurrency of them at a time, and each one stops by itself once past its deadline
+class Service:
+    def __init__(self, workers=None, concurrency=None, timeout=TIMEOUT):
+        self.workers = workers or os.cpu_count()
+        # workers forked from the server would inherit its client sockets and keep them open after the server
+        # closes them, so they start from a clean process instead
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+        # requests beyond this wait their turn here instead of piling up in the pool's queue
+        self.limit = asyncio.Semaphore(concurrency or self.workers * 2)
+        self.timeout = timeout
+        self.counts = {'solved': 0, 'unsolvable': 0, 'timeout': 0, 'error': 0}
+
+    # solve a problem and return (status, solution, seconds, nodes). status is 'solved', 'unsolvable',
+    # 'timeout' or 'error', in which case the solution is the error message
+    async def solve(self, problem, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        loop = asyncio.get_running_loop()
+        await self.limit.acquire()
+        try:
+            future = loop.run_in_executor(self.executor, solve_in_worker, problem, deadline)
+        except BaseException:
+            self.limit.release()
+            raise
+        # the slot is given back when the worker is done with the search, not when the request is answered, so a
+        # worker still busy past the deadline isn't handed more requests to queue behind it
+        future.add_done_callback(lambda _: self.limit.release())
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.time()) + GRACE)
+        except asyncio.TimeoutError:
+            # the worker is late to notice the deadline, answer without it
+            result = ('timeout', None, timeout, 0)
+        self.counts[result[0]] += 1
+        return result
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+
+
+# solve a problem from asyncio code on a service shared by the process, started on first use
+async def solve_async(problem, timeout=TIMEOUT):
+    global _service
+    if _service is None:
+        _service = Service()
+    status, solution, _, _ = await _service.solve(problem, timeout)
+    if status == 'error':
+        raise ValueError(solution)
+    if status == 'timeout':
+        raise asyncio.TimeoutError('no solution within %gs' % timeout)
+    return solution
+
+
+# the line protocol: every line a client sends is a problem, optionally followed by a timeout in seconds.
+# every line it gets back is the status, the solution or '-', the seconds taken and the search nodes, in the
+# order of the problems, always those four fields. a problem that can't be read is answered 'error - 0.000000 0':
+# the reason, which can hold spaces and whatever the client sent, stays with Service.solve and solve_async.
+# the problems of one connection are solved concurrently
+async def handle(service, reader, writer):
+    answers = deque()
+    ready = asyncio.Event()
+    done = False
+
+    async def write_answers():
+        while answers or not done:
+            if not answers:
+                ready.clear()
+                await ready.wait()
+                continue
+            status, solution, seconds, nodes = await answers.popleft()
+            if status == 'error':
+                solution = None
+            writer.write(('%s %s %.6f %d\n' % (status, solution or '-', seconds, nodes)).encode('ascii'))
+            await writer.drain()
+
+    sender = asyncio.ensure_future(write_answers())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            fields = line.decode('ascii', 'replace').split()
+            if not fields:
+                continue
+            try:
+                timeout = float(fields[1]) if len(fields) > 1 else None
+            except ValueError:
+                timeout = None
+            answers.append(asyncio.ensure_future(service.solve(fields[0], timeout)))
+            ready.set()
+    finally:
+        done = True
+        ready.set()
+        await sender
+        writer.close()
+        await writer.wait_closed()
+
+
+# serve the line protocol on a TCP port or, with path, a unix socket, until cancelled
+async def serve(service, host='127.0.0.1', port=8765, path=None):
+    callback = lambda reader, writer: handle(service, reader, writer)
+    if path:
+        server = await asyncio.start_unix_server(callback, path=path)
+    else:
+        server = await asyncio.start_server(callback, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the solver over a line protocol: send a problem per line, '
+                                                 'optionally followed by a timeout in seconds, and get back '
+                                                 '"status solution seconds nodes" per line.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=8765)
+    parser.add_argument('-u', '--unix', help='listen on this unix socket instead of a TCP port')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('-c', '--concurrency', type=int, default=None,
+                        help='searches handed to the workers at a time (default: twice the workers)')
+    parser.add_argument('-t', '--timeout', type=float, default=TIMEOUT, help='default seconds per problem')
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = Service(args.workers, args.concurrency, args.timeout)
+        try:
+            await serve(service, args.host, args.port, args.unix)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+from __future__ import print_function
+from collections import OrderedDict
+
+from core import Grid, Solver
+from rules import DEFAULT_RULES, hidden_singles
+
+
+# a puzzle being filled in one square at a time, for front ends that check every keystroke.
+# the candidates stay propagated after every change: assign propagates only from the square it sets and unassign
+# takes the changes back off the solver's trail, so neither starts over from the problem string.
+# squares are (row, col) spots counting from 1 and values are the digits of the {(row, col): [values]} view,
+# 1 to 9 for sudoku and 0 to 15 for hexadoku. a symbol character works as a value too
+class Session:
+    def __init__(self, problem, board=None, rules=DEFAULT_RULES):
+        self.grid = Grid(problem, board)
+        self.board = self.grid.board
+        self.solver = Solver(self.grid, rules=rules)
+        self.cells = list(self.grid.cells)
+        self.solver.reset(self.cells)
+        self.givens = set(i for i, c in enumerate(problem) if c != '.')
+        # the squares the user has filled in, in order, each with the trail length before it was set
+        self.moves = OrderedDict()
+        self.solution = None    # a solution that agrees with the candidates, found for hints that need a search
+        self.searcher = None
+        if not self.solver.prune_it(self.cells, -1):
+            raise ValueError('problem contradicts itself')
+
+    # fill in a square and propagate. returns {(row, col): [values]} of the candidates this removed from every
+    # square, the square itself included. a value that leaves some square without candidates changes nothing
+    # and raises ValueError, and so does a square that is a given or already filled in
+    def assign(self, spot, value):
+        index = self.solver.index(spot)
+        bit = self.bit(value)
+        if index in self.givens:
+            raise ValueError('%s is a given' % (spot,))
+        if index in self.moves:
+            raise ValueError('%s is already filled in' % (spot,))
+        if not self.cells[index] & bit:
+            raise ValueError('%s can no longer take %s' % (spot, value))
+        mark = len(self.solver.trail)
+        if not self.place(index, bit):
+            self.solver.undo(self.cells, mark)
+            raise ValueError('%s at %s leaves a square without candidates' % (value, spot))
+        self.moves[index] = mark
+        return self.removed(mark)
+
+    # clear a square the user filled in. returns {(row, col): [values]} of the candidates this gave back.
+    # the trail is undone to before the square was set and the squares filled in after it are set again
+    def unassign(self, spot):
+        index = self.solver.index(spot)
+        if index not in self.moves:
+            raise ValueError('%s is not filled in' % (spot,))
+        solver = self.solver
+        mark = self.moves[index]
+        order = list(self.moves)
+        later = order[order.index(index) + 1:]
+        # only the squares changed since the mark can come out different
+        before = dict((i, self.cells[i]) for i, _ in solver.trail[mark:])
+        values = [self.cells[i] for i in later]
+        solver.undo(self.cells, mark)
+        for i in order[order.index(index):]:
+            del self.moves[i]
+        for i, bit in zip(later, values):
+            self.moves[i] = len(solver.trail)
+            # fewer squares filled in can't make a later one contradict
+            self.place(i, bit)
+        return self.changed(dict((i, self.cells[i] & ~mask) for i, mask in before.items()))
+
+    # the values a square can still take
+    def candidates(self, spot):
+        mask = self.cells[self.solver.index(spot)]
+        digits = self.board.digits
+        return [digits[k] for k in range(self.board.size) if mask >> k & 1]
+
+    # a square to fill in next as ((row, col), value), or None once every square is filled in.
+    # a square propagation has settled comes first. without one, the hint comes from a solution of the current
+    # candidates, which takes a search but is kept for the next hints as long as it agrees with them.
+    # raises ValueError when the squares filled in so far lead to no solution
+    def next_hint(self):
+        popcount = self.board.popcount
+        open_squares = []
+        for index, mask in enumerate(self.cells):
+            if index in self.givens or index in self.moves:
+                continue
+            if popcount[mask] == 1:
+                return self.grid.spots[index], self.value(mask)
+            open_squares.append(index)
+        if not open_squares:
+            return None
+        if self.solution is None or any(not self.cells[i] & self.solution[i] for i in open_squares):
+            if self.searcher is None:
+                self.searcher = Solver(self.grid, rules=[name for name, _ in self.solver.rules])
+            self.solution = None
+            for solution in self.searcher.search(list(self.cells)):
+                self.solution = list(solution)
+                break
+            if self.solution is None:
+                raise ValueError('no solution from the squares filled in')
+        # the square with the fewest candidates is the one a hint helps most with
+        index = min(open_squares, key=lambda i: popcount[self.cells[i]])
+        return self.grid.spots[index], self.value(self.solution[index])
+
+    # True once every square has a single candidate
+    @property
+    def solved(self):
+        return len(self.solver.buckets[1]) == self.board.squares
+
+    # set a square to one value and propagate from it, to the same candidates as Solver.prune_it would.
+    # the rest of the board was already as far as the rules take it, so hidden singles only sweeps the units
+    # of the squares changed since its last sweep. returns False on a contradiction
+    def place(self, index, bit):
+        solver = self.solver
+        cells = self.cells
+        trail = solver.trail
+        top = self.board.topology
+        swept = len(trail)
+        solver.set_mask(cells, index, bit)
+        solver.pending = [index]
+        while True:
+            if not solver.remove_settled(cells):
+                return False
+            for name, rule in solver.rules:
+                before = solver.eliminated
+                if name == 'hidden_singles':
+                    units = set()
+                    for i, _ in trail[swept:]:
+                        units.update(top.square_units[i])
+                    swept = len(trail)
+                    if not hidden_singles(solver, cells, [top.unit_squares[unit] for unit in sorted(units)]):
+                        return False
+                elif not rule(solver, cells):
+                    return False
+                if solver.eliminated != before:
+                    break
+            else:
+                return True
+
+    # the candidate bit of a digit or a symbol
+    def bit(self, value):
+        board = self.board
+        if value in board.digits:
+            return 1 << board.digits.index(value)
+        if isinstance(value, str) and len(value) == 1 and value in board.symbols:
+            return 1 << board.symbols.index(value)
+        raise ValueError('%r is not a value of this board' % (value,))
+
+    # the digit of a single candidate bit
+    def value(self, mask):
+        return self.board.digits[mask.bit_length() - 1]
+
+    # the candidates removed since the trail was mark entries long, by square
+    def removed(self, mark):
+        first = {}
+        for index, mask in self.solver.trail[mark:]:
+            first.setdefault(index, mask)
+        return self.changed(dict((i, mask & ~self.cells[i]) for i, mask in first.items()))
+
+    # {(row, col): [values]} of the squares with changed candidate bits
+    def changed(self, masks):
+        size = self.board.size
+        digits = self.board.digits
+        spots = self.grid.spots
+        return dict((spots[i], [digits[k] for k in range(size) if mask >> k & 1])
+                    for i, mask in sorted(masks.items()) if mask)
@@ -0,0 +1,56 @@
+from __future__ import print_function
+
+
+# the rows, columns and houses of a board, as flat square indexes
+# squares are numbered row-major from 0. units are numbered rows first, then columns, then houses
+# houses are box_rows by box_cols squares, numbered row-major as well
+# everything is a tuple so that one instance can be shared by every solver of the same size
+class Topology:
+    def __init__(self, box_rows, box_cols=None):
+        box_cols = box_cols or box_rows
+        self.box_rows = box_rows
+        self.box_cols = box_cols
+        self.size = box_rows * box_cols     # number of rows, columns, houses and values
+        self.squares = self.size * self.size
+        size = self.size
+        bands = size // box_rows        # houses down the board
+        stacks = size // box_cols       # houses across the board
+        rows = [tuple(row * size + col for col in range(size)) for row in range(size)]
+        cols = [tuple(row * size + col for row in range(size)) for col in range(size)]
+        houses = [tuple((band * box_rows + row) * size + stack * box_cols + col
+                        for row in range(box_rows) for col in range(box_cols))
+                  for band in range(bands) for stack in range(stacks)]
+        # unit -> the squares in it
+        self.unit_squares = tuple(rows + cols + houses)
+        # square -> its row, column and house
+        self.square_units = tuple((index // size, size + index % size,
+                                   2 * size + index // size // box_rows * stacks + index % size // box_cols)
+                                  for index in range(self.squares))
+        # square -> the other squares in each of its units
+        self.unit_peers = tuple(tuple(tuple(other for other in self.unit_squares[unit] if other != index)
+                                      for unit in self.square_units[index])
+                                for index in range(self.squares))
+        # square -> every square it shares a unit with
+        self.peers = tuple(tuple(sorted(set(other for unit in self.unit_peers[index] for other in unit)))
+                           for index in range(self.squares))
+        # every place a row or column crosses a house, as (the squares of the crossing,
+        # the rest of the house, the rest of the line), which is what the pointing rules compare
+        crossings = []
+        for house in houses:
+            inside = set(house)
+            for line in set(self.square_units[index][k] for index in house for k in (0, 1)):
+                common = set(self.unit_squares[line]) & inside
+                crossings.append((tuple(sorted(common)), tuple(sorted(inside - common)),
+                                  tuple(sorted(set(self.unit_squares[line]) - common))))
+        self.crossings = tuple(sorted(crossings))
+
+
+_topologies = {}
+
+
+# the shared topology of a board whose houses are box_rows by box_cols squares, built once per process
+def topology(box_rows, box_cols=None):
+    key = (box_rows, box_cols or box_rows)
+    if key not in _topologies:
+        _topologies[key] = Topology(*key)
+    return _topologies[key]
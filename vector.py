@@ -0,0 +1,165 @@
+from __future__ import print_function
+import argparse, sys, time
+
+from core import Grid, Solver, board_for
+from puzzle_io import read_puzzles, SolutionWriter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# propagation for many problems at once: N problems of one board are an (N, squares) array of candidate masks,
+# and removing settled values from their peers and hidden singles run on all of them together as numpy
+# operations over the unit and peer index arrays of the topology.
+# the problems propagation can't finish go on to Solver's backtracking search from where propagation left them
+
+
+# the unsigned type that holds a candidate mask of a board
+def mask_type(board):
+    for bits, dtype in ((16, 'uint16'), (32, 'uint32'), (64, 'uint64')):
+        if board.size <= bits:
+            return np.dtype(dtype)
+    raise ValueError('boards of more than 64 values are too big for the numpy backend')
+
+
+# number of candidates of every mask in an array
+def popcount(masks):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks)
+    # count the bits in parallel, two at a time, then four, then eight, then add up the bytes
+    m = masks.astype(np.uint64)
+    m = m - ((m >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    m = (m & np.uint64(0x3333333333333333)) + ((m >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    m = (m + (m >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return ((m * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.uint8)
+
+
+# an (N, squares) array of candidate masks for problems of one board
+def parse(problems, board):
+    dtype = mask_type(board)
+    # the mask of every character, indexed by its byte
+    table = np.zeros(256, dtype=dtype)
+    table[ord('.')] = board.all
+    for k, c in enumerate(board.symbols):
+        table[ord(c)] = 1 << k
+    raw = np.frombuffer(''.join(problems).encode('ascii'), dtype=np.uint8)
+    cells = table[raw].reshape(len(problems), board.squares)
+    # a character that isn't a symbol maps to no candidates at all
+    if (cells == 0).any():
+        row = int(np.nonzero((cells == 0).any(axis=1))[0][0])
+        raise ValueError('unknown symbol in problem %d: %r' % (row, problems[row]))
+    return cells
+
+
+# remove settled values from their peers and fill in hidden singles on every problem until none of them changes.
+# cells is changed in place. returns a boolean array of the problems that ran into a contradiction
+def propagate(cells, board):
+    top = board.topology
+    size = board.size
+    full = cells.dtype.type(board.all)
+    zero = cells.dtype.type(0)
+    units = np.array(top.unit_squares)              # unit -> its squares
+    square_units = np.array(top.square_units)       # square -> its row, column and house
+    dead = np.zeros(len(cells), dtype=bool)
+    active = np.ones(len(cells), dtype=bool)
+    while active.any():
+        which = np.nonzero(active)[0]
+        c = cells[which]
+        before = c.copy()
+        # every settled value is taken in its units, so the other squares of those units lose it
+        settled = popcount(c) == 1
+        values = np.where(settled, c, zero)
+        by_unit = values[:, units]
+        taken = np.bitwise_or.reduce(by_unit, axis=2)
+        # two settled squares of a unit with the same value
+        clash = (popcount(taken) != (by_unit != 0).sum(axis=2)).any(axis=1)
+        around = np.bitwise_or.reduce(taken[:, square_units], axis=2)
+        c = np.where(settled, c, c & ~around)
+        # a value only one square of a unit can take goes there. once and twice are the values seen at least
+        # once and at least twice along each unit
+        by_unit = c[:, units]
+        once = np.zeros(taken.shape, dtype=c.dtype)
+        twice = np.zeros(taken.shape, dtype=c.dtype)
+        for position in range(size):
+            column = by_unit[:, :, position]
+            twice |= once & column
+            once |= column
+        # a value no square of a unit can take
+        missing = (once != full).any(axis=1)
+        singles = once & ~twice
+        single = np.bitwise_or.reduce(c[:, :, None] & singles[:, square_units], axis=2)
+        # two values only one square can take
+        crowded = (popcount(single) > 1).any(axis=1)
+        c = np.where(single != 0, single, c)
+        bad = clash | missing | crowded | (c == 0).any(axis=1)
+        cells[which] = c
+        dead[which[bad]] = True
+        active[which] = (c != before).any(axis=1) & ~bad
+    return dead
+
+
+# solve problems of one board, propagating all of them together and searching only the ones that need it.
+# returns the list of solution strings, None for the problems without a solution, and a count of how many
+# were settled by propagation alone, were found to have no solution, and were left to the search
+def solve_batch(problems, board=None):
+    if np is None:
+        raise ImportError('the numpy backend needs numpy, pip install numpy')
+    problems = list(problems)
+    if not problems:
+        return [], {'propagated': 0, 'unsolvable': 0, 'searched': 0}
+    board = board or board_for(len(problems[0]))
+    cells = parse(problems, board)
+    dead = propagate(cells, board)
+    settled = (popcount(cells) == 1).all(axis=1) & ~dead
+    solutions = [None] * len(problems)
+    counts = {'propagated': int(settled.sum()), 'unsolvable': int(dead.sum()), 'searched': 0}
+    symbols = np.frombuffer(board.symbols.encode('ascii'), dtype=np.uint8)
+    for row in np.nonzero(settled)[0]:
+        # a settled mask is a power of two, the position of its bit picks the symbol
+        bits = np.log2(cells[row].astype(np.float64)).astype(np.intp)
+        solutions[row] = symbols[bits].tobytes().decode('ascii')
+    for row in np.nonzero(~settled & ~dead)[0]:
+        counts['searched'] += 1
+        grid = Grid(problems[row], board)
+        solver = Solver(grid)
+        if solver.backtracking_search(grid.spots, [int(mask) for mask in cells[row]]):
+            solutions[row] = board.to_string(solver.solution)
+    return solutions, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve problems in batches with numpy propagation.')
+    parser.add_argument('files', nargs='*', default=['-'], help="problem files, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help='file for the solutions, .gz to compress')
+    parser.add_argument('-n', '--batch', type=int, default=4096, help='problems propagated together')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    totals = {'propagated': 0, 'unsolvable': 0, 'searched': 0}
+    with SolutionWriter(args.output) as writer:
+        batch = []
+        for path in args.files:
+            for problem in read_puzzles(path):
+                # a batch holds problems of one size
+                if batch and (len(batch) == args.batch or len(problem) != len(batch[0])):
+                    flush(batch, writer, totals)
+                    batch = []
+                batch.append(problem)
+        flush(batch, writer, totals)
+    print('%d problems in %.3fs: %d by propagation, %d searched, %d without a solution' % (
+        writer.written, time.time() - start, totals['propagated'], totals['searched'], totals['unsolvable']),
+        file=sys.stderr)
+    return 0
+
+
+def flush(batch, writer, totals):
+    solutions, counts = solve_batch(batch)
+    for solution in solutions:
+        writer.write(writer.written, solution)
+    for key in totals:
+        totals[key] += counts[key]
+
+
+if __name__ == '__main__':
+    sys.exit(main())